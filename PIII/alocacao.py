@@ -0,0 +1,399 @@
+# Alocação automática de professores às turmas.
+#
+# Restrição: um professor não pode ter duas turmas no mesmo semestre/dia/turno.
+# Como essa é a única restrição entre turmas, o problema se separa em um
+# emparelhamento bipartido (turma x professor) por (semestre, dia, turno).
+# Os horários mais disputados são resolvidos primeiro e, dentro de cada um,
+# os candidatos com menos turmas têm preferência, para distribuir a carga.
+#
+# Opcionalmente o cálculo é dividido entre processos (resolver(..., processos=N)):
+# os domínios de cada horário são independentes, e os horários só se acoplam pela
+# carga dos professores que têm em comum, então cada componente conexo do grafo
+# horário-professor é resolvido à parte. O resultado é idêntico ao sequencial.
+# Quando todos os horários formam um único componente (caso dos dados do
+# benchmark.py), só o cálculo dos domínios é paralelo; compare com
+# `python benchmark.py --escala 100k --processos 1,2,4` antes de ligar o padrão.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from cache import invalidar
+from ocupacao import ocupacao
+from disponibilidade import IndiceDisponibilidade, coluna_dia_turno, BIT_POR_COLUNA
+
+
+# Threads das consultas de carregar_em_paralelo (criadas sob demanda, compartilhadas entre requisições)
+_carregamento = ThreadPoolExecutor(max_workers=8, thread_name_prefix='carregar')
+
+processos_alocacao = 1  # padrão de resolver(processos=None); 1 = sem processos
+min_turmas_paralelo = 20000  # abaixo disso criar os processos custa mais que resolver direto
+
+# (problema, ocupados, por_horario) do pool do qual este processo é worker,
+# definido por _iniciar_processo (só nos processos filhos)
+_compartilhado = None
+
+
+class ProblemaAlocacao:
+    """Turmas e índices em memória necessários para calcular candidatos."""
+
+    def __init__(self, turmas, materia_por_materia_curso, professores_por_materia, indice):
+        self.turmas = turmas
+        self.materia_por_materia_curso = materia_por_materia_curso
+        self.professores_por_materia = professores_por_materia
+        self.indice = indice
+
+    @classmethod
+    def carregar(cls, cursor, semestre=None):
+        """Lê Turma, Materia_Curso, Professor_Materia e Disponibilidade uma única vez."""
+        return cls(
+            _carregar_turmas(cursor, semestre),
+            _carregar_materia_curso(cursor),
+            _carregar_professores_por_materia(cursor),
+            IndiceDisponibilidade.carregar(cursor),
+        )
+
+    @classmethod
+    def carregar_em_paralelo(cls, obter_conexao, semestre=None):
+        """
+        Como carregar(), mas com as quatro consultas ao mesmo tempo, cada uma em uma
+        conexão de `obter_conexao()`: o tempo total passa a ser o da consulta mais lenta.
+        Nenhuma conexão fica presa esperando outra, então não há deadlock no pool.
+        """
+        def consultar(carregar, *args):
+            with obter_conexao() as connection, connection.cursor() as cursor:
+                return carregar(cursor, *args)
+
+        futuros = [
+            _carregamento.submit(consultar, _carregar_turmas, semestre),
+            _carregamento.submit(consultar, _carregar_materia_curso),
+            _carregamento.submit(consultar, _carregar_professores_por_materia),
+            _carregamento.submit(consultar, IndiceDisponibilidade.carregar),
+        ]
+        return cls(*(futuro.result() for futuro in futuros))
+
+    def horario(self, turma):
+        """Coluna de disponibilidade da turma (ex.: segnoite) ou None se inválida."""
+        if not turma['dia_da_semana'] or not turma['turno']:
+            return None
+        coluna = coluna_dia_turno(turma['dia_da_semana'], turma['turno'])
+        return coluna if coluna in BIT_POR_COLUNA else None
+
+    def candidatos(self, turma):
+        """Professores que lecionam a matéria e estão livres no campus/dia/turno da turma."""
+        materia_id = self.materia_por_materia_curso.get(turma['materia_curso_id'])
+        if materia_id is None or self.horario(turma) is None:
+            return []
+        return self.indice.disponiveis(turma['campus_id'], turma['dia_da_semana'], turma['turno'],
+                                       candidatos=self.professores_por_materia.get(materia_id, ()))
+
+
+def _carregar_turmas(cursor, semestre=None):
+    query_turmas = "SELECT id, semestre, materia_curso_id, professor_id, turno, dia_da_semana, campus_id FROM Turma"
+    if semestre:
+        cursor.execute(query_turmas + " WHERE semestre = %s", (semestre,))
+    else:
+        cursor.execute(query_turmas)
+    return cursor.fetchall()
+
+
+def _carregar_materia_curso(cursor):
+    cursor.execute("SELECT id, materia_id FROM Materia_Curso")
+    return {mc['id']: mc['materia_id'] for mc in cursor.fetchall()}
+
+
+def _carregar_professores_por_materia(cursor):
+    cursor.execute("SELECT professor_id, materia_id FROM Professor_Materia")
+    professores_por_materia = {}
+    for pm in cursor.fetchall():
+        professores_por_materia.setdefault(pm['materia_id'], set()).add(pm['professor_id'])
+    return professores_por_materia
+
+
+def _emparelhar(turma_ids, dominios, carga):
+    """Emparelhamento máximo (caminhos aumentantes) de um único horário."""
+    professor_da_turma = {}
+    turma_do_professor = {}
+
+    def aumentar(inicio):
+        # Primeiro tenta um candidato livre, sem mexer nas escolhas anteriores
+        for professor_id in dominios[inicio]:
+            if professor_id not in turma_do_professor:
+                turma_do_professor[professor_id] = inicio
+                professor_da_turma[inicio] = professor_id
+                return True
+
+        # Senão, busca em profundidade iterativa por um caminho aumentante
+        visitados = set()
+        pilha = [(inicio, iter(dominios[inicio]))]
+        escolhas = []  # professor que levou de cada nível da pilha ao seguinte
+        while pilha:
+            turma_id, opcoes = pilha[-1]
+            for professor_id in opcoes:
+                if professor_id in visitados:
+                    continue
+                visitados.add(professor_id)
+                escolhas.append(professor_id)
+                atual = turma_do_professor.get(professor_id)
+                if atual is None:
+                    for (t, _), p in zip(pilha, escolhas):
+                        turma_do_professor[p] = t
+                        professor_da_turma[t] = p
+                    return True
+                pilha.append((atual, iter(dominios[atual])))
+                break
+            else:
+                pilha.pop()
+                if escolhas:
+                    escolhas.pop()
+        return False
+
+    # Turmas com menos opções primeiro; candidatos menos carregados primeiro
+    for turma_id in sorted(turma_ids, key=lambda t: (len(dominios[t]), t)):
+        dominios[turma_id] = sorted(dominios[turma_id], key=lambda p: (carga.get(p, 0), p))
+        aumentar(turma_id)
+    return professor_da_turma
+
+
+def _separar(problema, manter_existentes):
+    """Agrupa as turmas a alocar por (semestre, coluna) e conta a carga das já alocadas."""
+    ocupados = set()  # (professor_id, semestre, coluna)
+    carga = {}
+    por_horario = {}
+    sem_professor = []
+
+    for turma in problema.turmas:
+        coluna = problema.horario(turma)
+        if manter_existentes and turma['professor_id']:
+            if coluna is not None:
+                ocupados.add((turma['professor_id'], turma['semestre'], coluna))
+            carga[turma['professor_id']] = carga.get(turma['professor_id'], 0) + 1
+            continue
+        if coluna is None:
+            sem_professor.append(turma['id'])
+            continue
+        por_horario.setdefault((turma['semestre'], coluna), []).append(turma)
+    return ocupados, carga, por_horario, sem_professor
+
+
+def _dominios(problema, ocupados, horario, turmas):
+    """Propagação: remove professores já ocupados e separa as turmas sem domínio."""
+    semestre, coluna = horario
+    dominios = {}
+    sem_professor = []
+    for turma in turmas:
+        dominio = [p for p in problema.candidatos(turma) if (p, semestre, coluna) not in ocupados]
+        if dominio:
+            dominios[turma['id']] = dominio
+        else:
+            sem_professor.append(turma['id'])
+    return dominios, sem_professor
+
+
+def _iniciar_processo(problema, ocupados, por_horario):
+    # initargs de um pool com fork chegam ao filho herdados (cópia sob demanda das
+    # páginas), sem serialização, e pertencem só a esse pool: resoluções simultâneas
+    # no mesmo processo pai não se misturam
+    global _compartilhado
+    _compartilhado = (problema, ocupados, por_horario)
+
+
+def _inteiro_positivo(valor, nome):
+    if isinstance(valor, bool):
+        raise ValueError(f"'{nome}' deve ser um inteiro positivo")
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{nome}' deve ser um inteiro positivo") from None
+    if valor < 1:
+        raise ValueError(f"'{nome}' deve ser um inteiro positivo")
+    return valor
+
+
+def numero_de_processos(processos=None):
+    """Valida `processos` (None = processos_alocacao) e limita aos núcleos da máquina."""
+    if processos is None:
+        processos = processos_alocacao
+    return min(_inteiro_positivo(processos, 'processos'), os.cpu_count() or 1)
+
+
+def carga_maxima_valida(carga_maxima=None):
+    """Valida `carga_maxima`: None (sem limite) ou um inteiro >= 1."""
+    if carga_maxima is None:
+        return None
+    return _inteiro_positivo(carga_maxima, 'carga_maxima')
+
+
+def _dominios_no_processo(horario):
+    problema, ocupados, por_horario = _compartilhado
+    return horario, _dominios(problema, ocupados, horario, por_horario[horario])
+
+
+def _resolver_horarios(horarios, carga, carga_maxima=None, progresso=None, total=None, feitos=0):
+    """Emparelha os horários na ordem dada, atualizando `carga` a cada um."""
+    alocacoes = {}
+    sem_professor = []
+    for resolvidos, (_, dominios) in enumerate(horarios, feitos):
+        if progresso:
+            progresso(resolvidos, total, "Resolvendo horários")
+        if carga_maxima is not None:
+            for turma_id in list(dominios):
+                dominios[turma_id] = [p for p in dominios[turma_id] if carga.get(p, 0) < carga_maxima]
+        emparelhamento = _emparelhar(list(dominios), dominios, carga)
+        for turma_id in dominios:
+            professor_id = emparelhamento.get(turma_id)
+            if professor_id is None:
+                sem_professor.append(turma_id)
+                continue
+            alocacoes[turma_id] = professor_id
+            carga[professor_id] = carga.get(professor_id, 0) + 1
+    return alocacoes, sem_professor
+
+
+def _componentes(horarios):
+    """
+    Separa os horários (já ordenados) em grupos que não compartilham professores,
+    mantendo a ordem original dentro de cada grupo e ordenando os grupos pelo primeiro horário.
+    """
+    pai = list(range(len(horarios)))
+
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    primeiro_horario = {}  # professor_id -> índice do primeiro horário em que aparece
+    for i, (_, dominios) in enumerate(horarios):
+        for dominio in dominios.values():
+            for professor_id in dominio:
+                j = primeiro_horario.setdefault(professor_id, i)
+                a, b = raiz(i), raiz(j)
+                if a != b:
+                    pai[max(a, b)] = min(a, b)
+
+    grupos = {}
+    for i, item in enumerate(horarios):
+        grupos.setdefault(raiz(i), []).append(item)
+    return [grupos[r] for r in sorted(grupos)]
+
+
+def _pode_paralelizar(processos, problema):
+    # O fork é o que deixa os índices chegarem aos processos sem cópia; sem ele (Windows), sequencial
+    return (processos > 1 and len(problema.turmas) >= min_turmas_paralelo
+            and 'fork' in multiprocessing.get_all_start_methods())
+
+
+def resolver(problema, manter_existentes=True, carga_maxima=None, progresso=None, processos=None):
+    """
+    Calcula professor_id para as turmas do problema.
+
+    Retorna (alocacoes, sem_professor): um dict turma_id -> professor_id com as
+    novas alocações e a lista de turmas que ficaram sem professor compatível.
+    `progresso(feitos, total, mensagem)`, se informado, é chamado a cada horário resolvido.
+    `processos` (padrão processos_alocacao, no máximo os núcleos da máquina) limita quantos
+    processos dividem o cálculo; problemas com menos de min_turmas_paralelo turmas são
+    resolvidos no próprio processo.
+    """
+    processos = numero_de_processos(processos)
+    carga_maxima = carga_maxima_valida(carga_maxima)
+    ocupados, carga, por_horario, sem_professor = _separar(problema, manter_existentes)
+
+    # Horários mais disputados (menos candidatos por turma) primeiro
+    def aperto(item):
+        dominios = item[1]
+        return sum(len(d) for d in dominios.values()) / len(dominios), item[0]
+
+    if not _pode_paralelizar(processos, problema):
+        dominios_por_horario = {}
+        for horario, turmas in por_horario.items():
+            dominios, sem_dominio = _dominios(problema, ocupados, horario, turmas)
+            sem_professor.extend(sem_dominio)
+            if dominios:
+                dominios_por_horario[horario] = dominios
+        horarios = sorted(dominios_por_horario.items(), key=aperto)
+        alocacoes, sem_vaga = _resolver_horarios(horarios, carga, carga_maxima, progresso, len(horarios))
+        if progresso:
+            progresso(len(horarios), len(horarios), "Horários resolvidos")
+        return alocacoes, sorted(sem_professor + sem_vaga)
+
+    # Os filhos só fazem cálculo em memória: não tocam em conexões, locks ou arquivos do pai
+    contexto = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(processos, len(por_horario)) or 1, mp_context=contexto,
+                             initializer=_iniciar_processo, initargs=(problema, ocupados, por_horario)) as executor:
+        dominios_por_horario = {}
+        for horario, (dominios, sem_dominio) in executor.map(_dominios_no_processo, sorted(por_horario)):
+            sem_professor.extend(sem_dominio)
+            if dominios:
+                dominios_por_horario[horario] = dominios
+        horarios = sorted(dominios_por_horario.items(), key=aperto)
+        componentes = _componentes(horarios)
+
+        # Cada componente parte da mesma carga inicial e só altera a de seus próprios professores
+        alocacoes = {}
+        if len(componentes) == 1:
+            parciais = [_resolver_horarios(horarios, carga, carga_maxima, progresso, len(horarios))]
+        else:
+            futuros = {executor.submit(_resolver_horarios, componente, carga, carga_maxima): i
+                       for i, componente in enumerate(componentes)}
+            parciais = [None] * len(componentes)
+            resolvidos = 0
+            for futuro in as_completed(futuros):
+                parciais[futuros[futuro]] = futuro.result()
+                resolvidos += len(componentes[futuros[futuro]])
+                if progresso:
+                    progresso(resolvidos, len(horarios), "Resolvendo horários")
+        for alocacoes_componente, sem_vaga in parciais:
+            alocacoes.update(alocacoes_componente)
+            sem_professor.extend(sem_vaga)
+
+    if progresso:
+        progresso(len(horarios), len(horarios), "Horários resolvidos")
+    return alocacoes, sorted(sem_professor)
+
+
+def gravar_alocacoes(connection, alocacoes):
+    """Grava todas as alocações em Turma em uma única transação."""
+    if not alocacoes:
+        return
+    turma_ids = sorted(alocacoes)
+    try:
+        with connection.cursor() as cursor:
+            # Libera as turmas antes de reatribuí-las: trocas de professor entre turmas
+            # do mesmo horário violariam a restrição UNIQUE no meio do lote
+            cursor.executemany("UPDATE Turma SET professor_id = NULL WHERE id = %s", turma_ids)
+            cursor.executemany(
+                "UPDATE Turma SET professor_id = %s WHERE id = %s",
+                [(alocacoes[turma_id], turma_id) for turma_id in turma_ids if alocacoes[turma_id]],
+            )
+        connection.commit()
+        invalidar('Turma')
+        ocupacao.descartar()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def alocar(connection, semestre=None, manter_existentes=True, carga_maxima=None, aplicar=True, progresso=None,
+           processos=None):
+    """Carrega o problema, resolve e (se `aplicar`) grava o resultado em Turma."""
+    if progresso:
+        progresso(0, None, "Carregando turmas e disponibilidades")
+    with connection.cursor() as cursor:
+        problema = ProblemaAlocacao.carregar(cursor, semestre)
+    alocacoes, sem_professor = resolver(problema, manter_existentes, carga_maxima, progresso, processos)
+    if aplicar:
+        if progresso:
+            progresso(1, 1, "Gravando alocações")
+        gravacao = dict(alocacoes)
+        if not manter_existentes:
+            # Turmas que perderam o professor não podem manter a alocação antiga
+            gravacao.update((turma_id, None) for turma_id in sem_professor)
+        gravar_alocacoes(connection, gravacao)
+    return {
+        "total_turmas": len(problema.turmas),
+        "alocadas": len(alocacoes),
+        "sem_professor": sem_professor,
+        "alocacoes": [{"turma_id": t, "professor_id": p} for t, p in sorted(alocacoes.items())],
+        "aplicado": aplicar,
+    }
@@ -0,0 +1,163 @@
+# Modo ASGI da API: as mesmas rotas do Flask servidas por um event loop.
+#
+# O loop cuida das conexões HTTP (keep-alive, clientes lentos, uploads), que não
+# ocupam thread nenhuma; só o processamento da requisição (flask-restx + pymysql)
+# roda em um pool limitado de threads. Assim um processo aceita centenas de clientes
+# do dashboard/API, com no máximo `asgi_threads` requisições usando o banco ao mesmo
+# tempo (e ainda limitadas pelo pool de conexões de db.py).
+#
+# Não depende de nenhuma biblioteca além da API; precisa de um servidor ASGI, ex.:
+#     uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+from configuracoes import configuracoes
+from main import app as flask_app
+
+asgi_threads = 32  # requisições processadas ao mesmo tempo
+
+
+class AdaptadorASGI:
+    """Aplicação ASGI que executa uma aplicação WSGI em um pool de threads."""
+
+    def __init__(self, wsgi_app, max_threads=asgi_threads):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'websocket':
+            # A API não tem rotas websocket: recusa a conexão (o servidor responde 403)
+            message = await receive()
+            if message['type'] == 'websocket.connect':
+                await send({'type': 'websocket.close', 'code': 1000})
+        # Outros tipos de conexão são ignorados: a aplicação retorna sem responder
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Espera as requisições em andamento antes de fechar as conexões
+                await asyncio.get_running_loop().run_in_executor(None, self._encerrar)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _encerrar(self):
+        self.executor.shutdown(wait=True)
+        db.get_pool().close_all()
+
+    async def _http(self, scope, receive, send):
+        corpo = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            corpo.extend(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        resposta = _RespostaWSGI()
+        environ = _environ(scope, bytes(corpo))
+        resultado = await loop.run_in_executor(self.executor, self.wsgi_app, environ, resposta.start_response)
+        iterador = iter(resultado)
+        try:
+            enviado = False
+            while True:
+                # Cada bloco é gerado em uma thread: respostas em stream consultam o banco
+                bloco = await loop.run_in_executor(self.executor, next, iterador, None)
+                if bloco is None:
+                    break
+                bloco = resposta.pendente() + bloco
+                if not bloco:
+                    continue
+                if not enviado:
+                    await send(resposta.inicio())
+                    enviado = True
+                await send({'type': 'http.response.body', 'body': bloco, 'more_body': True})
+            if not enviado:
+                await send(resposta.inicio())
+            await send({'type': 'http.response.body', 'body': resposta.pendente(), 'more_body': False})
+        finally:
+            if hasattr(resultado, 'close'):
+                await loop.run_in_executor(self.executor, resultado.close)
+
+
+class _RespostaWSGI:
+    """Guarda o status e os cabeçalhos do start_response até o primeiro bloco do corpo."""
+
+    def __init__(self):
+        self.status = None
+        self.headers = []
+        self._escritos = []
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.status is not None:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = status
+        self.headers = headers
+        return self._escritos.append  # write() legado do WSGI
+
+    def pendente(self):
+        dados = b''.join(self._escritos)
+        self._escritos = []
+        return dados
+
+    def inicio(self):
+        return {
+            'type': 'http.response.start',
+            'status': int(self.status.split(' ', 1)[0]),
+            'headers': [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in self.headers],
+        }
+
+
+def _environ(scope, corpo):
+    servidor = scope.get('server') or ('localhost', 80)
+    cliente = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': servidor[0],
+        'SERVER_PORT': str(servidor[1]),
+        'REMOTE_ADDR': cliente[0],
+        'REMOTE_PORT': str(cliente[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for nome, valor in scope.get('headers', []):
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            chave = nome
+        else:
+            chave = f'HTTP_{nome}'
+        environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    # O corpo já foi lido inteiro (inclusive quando veio em chunked)
+    environ['CONTENT_LENGTH'] = str(len(corpo))
+    return environ
+
+
+app = AdaptadorASGI(flask_app)
+
+try:
+    configuracoes.instalar_sighup()
+except ValueError:
+    pass  # importado fora da thread principal: a recarga fica só por PI2_CONFIG_RELOAD
@@ -0,0 +1,409 @@
+# Benchmark dos caminhos críticos da API: listagens, compatibilidade de turmas e importação.
+#
+# Gera dados sintéticos (campi, professores, matérias, disponibilidades e turmas) na
+# escala pedida e mede a latência (p50/p90/p99) e a vazão de cada cenário pelo
+# test client do Flask, sem servidor HTTP no meio.
+#
+# Por padrão usa um banco SQLite temporário com um adaptador que imita o DictCursor
+# do pymysql, para rodar em qualquer máquina. Com --mysql os mesmos cenários rodam
+# em um MySQL/MariaDB local; o banco apontado pelo arquivo precisa estar vazio.
+#
+# Uso:
+#     python benchmark.py --escala 10k
+#     python benchmark.py --escala 1k --repeticoes 200 --json resultado.json
+#     python benchmark.py --escala 100k --mysql configdb_benchmark.json
+#     python benchmark.py --escala 100k --processos 1,2,4   (alocação com N processos)
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import cache
+import db
+from disponibilidade import COLUNAS_DISPONIBILIDADE, DIAS_DA_SEMANA, TURNOS
+
+escalas = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+semestres = ['2024.1', '2024.2']
+# Os campi da importação de disponibilidades (db.campos_por_campus) precisam existir
+campi = ['Asa Norte', 'Taguatinga', 'Ceilândia', 'Gama']
+
+schema = [
+    "CREATE TABLE Campus (id {pk}, nome VARCHAR(255))",
+    "CREATE TABLE Curso (id {pk}, name VARCHAR(255))",
+    "CREATE TABLE Turno (id {pk}, hturno INT)",
+    "CREATE TABLE Professores (id {pk}, nome VARCHAR(255), curriculo TEXT, email VARCHAR(255))",
+    "CREATE TABLE Materia (id {pk}, nome VARCHAR(255), semestre INT, modalidade VARCHAR(50),"
+    " curriculo TEXT, area VARCHAR(255))",
+    "CREATE TABLE Materia_Curso (id {pk}, materia_id INT, curso_id INT)",
+    "CREATE TABLE Professor_Materia (id {pk}, professor_id INT, materia_id INT)",
+    "CREATE TABLE Disponibilidade (id {pk}, professor_id INT, turno_id INT, campus_id INT, consideracoes TEXT, "
+    + ', '.join(f"{coluna} TINYINT DEFAULT 0" for coluna in COLUNAS_DISPONIBILIDADE) + ")",
+    "CREATE TABLE Professor_Disponibilidade (id {pk}, professor_id INT, disponibilidade_id INT)",
+    "CREATE TABLE Turma (id {pk}, semestre VARCHAR(10), materia_curso_id INT, professor_id INT,"
+    " turno VARCHAR(10), dia_da_semana VARCHAR(10), campus_id INT, materia_id INT,"
+    " UNIQUE (professor_id, semestre, dia_da_semana, turno))",
+    "CREATE INDEX idx_materia_curso ON Materia_Curso (materia_id)",
+    "CREATE INDEX idx_professor_materia ON Professor_Materia (materia_id)",
+    "CREATE INDEX idx_disponibilidade ON Disponibilidade (professor_id)",
+]
+chave_primaria = {
+    'sqlite': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'mysql': 'INT AUTO_INCREMENT PRIMARY KEY',
+}
+
+
+# --- Adaptador SQLite com a interface do pymysql usada pela API ---
+
+class SQLiteCursor:
+    """Cursor que aceita os placeholders %s e devolve dicionários, como o DictCursor."""
+
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+        self.lastrowid = None
+        self.rowcount = -1
+
+    @staticmethod
+    def _sql(query):
+        return query.replace('%s', '?')
+
+    def execute(self, query, params=None):
+        self._cursor.execute(self._sql(query), tuple(params or ()))
+        self.rowcount = self._cursor.rowcount
+        if self._cursor.lastrowid and query.lstrip().upper().startswith('INSERT'):
+            # O pymysql devolve o id da primeira linha de um INSERT de várias linhas
+            self.lastrowid = self._cursor.lastrowid - max(self.rowcount, 1) + 1
+        return self.rowcount
+
+    def executemany(self, query, seq):
+        seq = [tuple(params) if isinstance(params, (list, tuple)) else (params,) for params in seq]
+        if not seq:
+            return 0
+        self._cursor.executemany(self._sql(query), seq)
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def _linhas(self, rows):
+        colunas = [coluna[0] for coluna in self._cursor.description or ()]
+        return [dict(zip(colunas, row)) for row in rows]
+
+    @property
+    def description(self):
+        # Sem tipos no SQLite: a exportação trata todas as colunas como texto
+        return [(coluna[0], None) for coluna in self._cursor.description or ()]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._linhas([row])[0] if row is not None else None
+
+    def fetchmany(self, size=1):
+        return self._linhas(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._linhas(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        return SQLiteCursor(self._connection)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def close(self):
+        self.open = False
+        self._connection.close()
+
+
+# --- Dados sintéticos ---
+
+def gerar_dados(escala, seed=42):
+    """Linhas de cada tabela para `escala` turmas (as demais tabelas crescem proporcionalmente)."""
+    rnd = random.Random(seed)
+    n_professores = max(20, escala // 5)
+    n_materias = max(10, escala // 20)
+    n_cursos = max(2, escala // 500)
+
+    dados = {
+        'Campus': [(nome,) for nome in campi],
+        'Curso': [(f"Curso {i}",) for i in range(1, n_cursos + 1)],
+        'Turno': [(4,), (4,), (4,)],
+        'Professores': [(f"Professor {i}", f"Currículo do professor {i}", f"prof{i}@exemplo.edu")
+                        for i in range(1, n_professores + 1)],
+        'Materia': [(f"Matéria {i}", rnd.randint(1, 8), rnd.choice(['presencial', 'ead']), '', f"Área {i % 12}")
+                    for i in range(1, n_materias + 1)],
+    }
+    materia_curso = []
+    for materia_id in range(1, n_materias + 1):
+        for curso_id in rnd.sample(range(1, n_cursos + 1), min(2, n_cursos)):
+            materia_curso.append((materia_id, curso_id))
+    dados['Materia_Curso'] = materia_curso
+
+    dados['Professor_Materia'] = [
+        (professor_id, materia_id)
+        for professor_id in range(1, n_professores + 1)
+        for materia_id in rnd.sample(range(1, n_materias + 1), min(3, n_materias))
+    ]
+
+    disponibilidades = []
+    for professor_id in range(1, n_professores + 1):
+        for campus_id in rnd.sample(range(1, len(campi) + 1), 2):
+            horarios = [1 if rnd.random() < 0.3 else 0 for _ in COLUNAS_DISPONIBILIDADE]
+            disponibilidades.append((professor_id, None, campus_id, '', *horarios))
+    dados['Disponibilidade'] = disponibilidades
+    dados['Professor_Disponibilidade'] = [(d[0], i) for i, d in enumerate(disponibilidades, start=1)]
+
+    dados['Turma'] = []
+    for _ in range(escala):
+        materia_curso_id = rnd.randint(1, len(materia_curso))
+        dados['Turma'].append((
+            rnd.choice(semestres), materia_curso_id, None, rnd.choice(TURNOS), rnd.choice(DIAS_DA_SEMANA),
+            rnd.randint(1, len(campi)), materia_curso[materia_curso_id - 1][0],
+        ))
+    return dados
+
+
+colunas_insert = {
+    'Campus': ['nome'],
+    'Curso': ['name'],
+    'Turno': ['hturno'],
+    'Professores': ['nome', 'curriculo', 'email'],
+    'Materia': ['nome', 'semestre', 'modalidade', 'curriculo', 'area'],
+    'Materia_Curso': ['materia_id', 'curso_id'],
+    'Professor_Materia': ['professor_id', 'materia_id'],
+    'Disponibilidade': ['professor_id', 'turno_id', 'campus_id', 'consideracoes'] + COLUNAS_DISPONIBILIDADE,
+    'Professor_Disponibilidade': ['professor_id', 'disponibilidade_id'],
+    'Turma': ['semestre', 'materia_curso_id', 'professor_id', 'turno', 'dia_da_semana', 'campus_id', 'materia_id'],
+}
+
+
+def popular(connection, dialeto, dados):
+    with connection.cursor() as cursor:
+        for comando in schema:
+            cursor.execute(comando.format(pk=chave_primaria[dialeto]))
+        for tabela, colunas in colunas_insert.items():
+            query = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+            for lote in db.chunks(dados[tabela], 5000):
+                cursor.executemany(query, lote)
+    connection.commit()
+
+
+def linhas_professores(n, rnd):
+    """Linhas no formato da planilha de professores (sync.colunas_professores)."""
+    return [{'nome': f"Novo professor {i}", 'email': f"novo{i}@exemplo.edu", 'curriculo': '',
+             'materia3': f"Matéria {rnd.randint(1, 10)}, Matéria {rnd.randint(1, 10)}",
+             'materia4': '', 'materia5': 'N/A'} for i in range(n)]
+
+
+def linhas_disponibilidades(n, rnd):
+    """Linhas no formato do formulário de disponibilidade (sync.colunas_disponibilidades)."""
+    dias = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta']
+    return [{'nome': f"Professor {i + 1}", 'email': f"prof{i + 1}@exemplo.edu", 'campus': 'Asa Norte, Taguatinga',
+             'diasdemanha': ', '.join(rnd.sample(dias, 2)), 'diasdetarde': 'N/A',
+             'diasdenoite': ', '.join(rnd.sample(dias, 3)), 'observacao1': '',
+             'diasdemanha2': 'N/A', 'diasdetarde2': ', '.join(rnd.sample(dias, 1)),
+             'diasdenoite3': 'N/A', 'observacao2': ''} for i in range(n)]
+
+
+# --- Medição ---
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def medir(nome, funcao, repeticoes, aquecimento, frio):
+    for _ in range(aquecimento):
+        funcao()
+    duracoes = []
+    inicio_total = time.perf_counter()
+    for _ in range(repeticoes):
+        if frio:
+            cache.invalidar()
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+    return {
+        'cenario': nome,
+        'repeticoes': repeticoes,
+        'p50_ms': percentil(duracoes, 50) * 1000,
+        'p90_ms': percentil(duracoes, 90) * 1000,
+        'p99_ms': percentil(duracoes, 99) * 1000,
+        'max_ms': max(duracoes) * 1000,
+        'media_ms': statistics.fmean(duracoes) * 1000,
+        'por_segundo': repeticoes / total if total else float('inf'),
+    }
+
+
+def requisicao(client, url, status=(200,)):
+    def executar():
+        response = client.get(url)
+        if response.status_code not in status:
+            raise RuntimeError(f"GET {url} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        response.get_data()
+    return executar
+
+
+def cenarios(client, escala, rnd):
+    turma_ids = list(range(1, escala + 1))
+    return [
+        ('GET /campus', requisicao(client, '/campus')),
+        ('GET /professores?limit=100', requisicao(client, '/professores?limit=100')),
+        ('GET /professores?limit=1000&fields=id,nome', requisicao(client, '/professores?limit=1000&fields=id,nome')),
+        ('GET /disponibilidades?limit=100', requisicao(client, '/disponibilidades?limit=100')),
+        ('GET /turmas?limit=100', requisicao(client, '/turmas?limit=100')),
+        ('GET /turmas?semestre=2024.1&limit=1000', requisicao(client, '/turmas?semestre=2024.1&limit=1000')),
+        # 404 quando nenhum professor atende a turma sorteada
+        ('GET /turmas/<id>/professores_compativeis',
+         lambda: requisicao(client, f'/turmas/{rnd.choice(turma_ids)}/professores_compativeis', (200, 404))()),
+        ('GET /turmas/professores_compativeis?semestre=2024.1',
+         requisicao(client, '/turmas/professores_compativeis?semestre=2024.1')),
+    ]
+
+
+def cenarios_importacao(rnd, tamanho):
+    return [
+        (f'insert_data_to_mysql ({tamanho} linhas)',
+         lambda: db.insert_data_to_mysql(linhas_professores(tamanho, rnd))),
+        (f'insert_disponibilidades_to_mysql ({tamanho} linhas)',
+         lambda: db.insert_disponibilidades_to_mysql(linhas_disponibilidades(tamanho, rnd))),
+    ]
+
+
+def cenarios_alocacao(processos):
+    # Carregado uma vez: mede só o resolver, que é a parte dividida entre processos
+    from alocacao import ProblemaAlocacao, numero_de_processos, resolver
+    with db.get_connection() as connection, connection.cursor() as cursor:
+        problema = ProblemaAlocacao.carregar(cursor)
+    # O resolver limita o pedido aos núcleos da máquina; o rótulo mostra o número efetivo
+    efetivos = dict.fromkeys(numero_de_processos(n) for n in processos)
+    return [
+        (f'resolver ({n} processo{"s" if n > 1 else ""})',
+         lambda n=n: resolver(problema, manter_existentes=False, processos=n))
+        for n in efetivos
+    ]
+
+
+def imprimir(resultados):
+    cabecalho = f"{'cenário':<55} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>9}"
+    print(cabecalho)
+    print('-' * len(cabecalho))
+    for r in resultados:
+        print(f"{r['cenario']:<55} {r['repeticoes']:>5} {r['p50_ms']:>9.2f} {r['p90_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['max_ms']:>9.2f} {r['por_segundo']:>9.1f}")
+
+
+def ler_escala(valor):
+    if valor.lower() in escalas:
+        return escalas[valor.lower()]
+    return int(valor)
+
+
+def preparar_banco(args, dados):
+    """Cria o banco, popula e aponta o pool de db.py para ele."""
+    if args.mysql:
+        with open(args.mysql) as f:
+            config = json.load(f)
+        connection = db.create_connection(config)
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW TABLES")
+            if cursor.fetchall():
+                raise SystemExit(f"O banco {config['db']} não está vazio; use um banco só para o benchmark.")
+        popular(connection, 'mysql', dados)
+        connection.close()
+        db._pool = db.ConnectionPool(lambda: db.create_connection(config), max_size=db.pool_size)
+        return None
+    diretorio = tempfile.mkdtemp(prefix='pi2-benchmark-')
+    path = os.path.join(diretorio, 'benchmark.sqlite3')
+    connection = SQLiteConnection(path)
+    connection._connection.execute("PRAGMA journal_mode=WAL")
+    popular(connection, 'sqlite', dados)
+    connection.close()
+    db._pool = db.ConnectionPool(lambda: SQLiteConnection(path), max_size=db.pool_size)
+    # O SQLite não tem @@auto_increment_increment; ids de INTEGER PRIMARY KEY são sempre consecutivos
+    db._ids_consecutivos = True
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints e das importações da API.")
+    parser.add_argument('--escala', default='1k', help="Número de turmas: 1k, 10k, 100k ou um inteiro")
+    parser.add_argument('--repeticoes', type=int, default=50, help="Medições por cenário")
+    parser.add_argument('--aquecimento', type=int, default=3, help="Execuções descartadas antes de medir")
+    parser.add_argument('--importacao', type=int, default=500, help="Linhas por chamada nas importações")
+    parser.add_argument('--frio', action='store_true', help="Limpa o cache da API antes de cada medição")
+    parser.add_argument('--mysql', metavar='CONFIG', help="JSON no formato do configdb.json de um banco vazio")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', metavar='ARQUIVO', help="Grava os resultados em JSON para comparar execuções")
+    parser.add_argument('--processos', default='',
+                        help="Mede o resolver da alocação com cada número de processos, ex.: 1,2,4")
+    args = parser.parse_args()
+
+    escala = ler_escala(args.escala)
+    rnd = random.Random(args.seed)
+    inicio = time.perf_counter()
+    dados = gerar_dados(escala, args.seed)
+    path = preparar_banco(args, dados)
+    print(f"Banco {'MySQL' if args.mysql else path} com {escala} turmas, "
+          f"{len(dados['Professores'])} professores e {len(dados['Materia'])} matérias "
+          f"({time.perf_counter() - inicio:.1f}s)\n")
+
+    # Importado só agora: a API usa o pool configurado acima
+    from main import app
+    client = app.test_client()
+
+    resultados = []
+    # A API imprime uma linha por conexão; a saída é descartada durante as medições
+    with contextlib.redirect_stdout(io.StringIO()):
+        for nome, funcao in cenarios(client, escala, rnd):
+            resultados.append(medir(nome, funcao, args.repeticoes, args.aquecimento, args.frio))
+        repeticoes_importacao = max(1, args.repeticoes // 10)
+        for nome, funcao in cenarios_importacao(rnd, args.importacao):
+            resultados.append(medir(nome, funcao, repeticoes_importacao, 1, args.frio))
+        if args.processos:
+            processos = [int(n) for n in args.processos.split(',')]
+            for nome, funcao in cenarios_alocacao(processos):
+                resultados.append(medir(nome, funcao, repeticoes_importacao, 1, False))
+
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'escala': escala, 'banco': 'mysql' if args.mysql else 'sqlite',
+                       'python': sys.version.split()[0], 'resultados': resultados}, f, indent=2)
+    db.get_pool().close_all()
+
+
+if __name__ == "__main__":
+    main()
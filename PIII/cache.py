@@ -0,0 +1,144 @@
+# Cache em memória (TTL + LRU) das tabelas de referência: Campus, Curso, Turno, Materia e Materia_Curso,
+# e contadores de versão por tabela usados nos ETags das rotas de leitura.
+# As escritas chamam invalidar() explicitamente; o TTL (e etag_max_age) limita o tempo
+# que outro processo pode ver dados antigos.
+
+import os
+import threading
+import time
+from functools import wraps
+
+from cachetools import TTLCache
+from flask import Response, request
+
+cache_ttl = 300       # segundos
+cache_maxsize = 1024  # entradas por tabela
+etag_max_age = 60     # segundos até um ETag expirar mesmo sem escritas neste processo
+
+tabelas = ['Campus', 'Curso', 'Turno', 'Materia', 'Materia_Curso']
+
+_lock = threading.RLock()
+_caches = {tabela: TTLCache(maxsize=cache_maxsize, ttl=cache_ttl) for tabela in tabelas}
+# A geração muda a cada invalidação; um valor carregado antes dela não é guardado
+_geracoes = dict.fromkeys(tabelas, 0)
+_stats = {tabela: {"hits": 0, "misses": 0, "invalidations": 0} for tabela in tabelas}
+# Versão de cada tabela (qualquer tabela, não só as de referência), incrementada a cada escrita
+_versoes = {}
+# Distingue os ETags deste processo dos de outro processo ou de uma execução anterior
+_instancia = os.urandom(4).hex()
+
+_ausente = object()
+
+
+def buscar(tabela, chave):
+    with _lock:
+        valor = _caches[tabela].get(chave, _ausente)
+        _stats[tabela]["hits" if valor is not _ausente else "misses"] += 1
+        return valor
+
+
+def geracao(tabela):
+    with _lock:
+        return _geracoes[tabela]
+
+
+def guardar(tabela, chave, valor, geracao_lida):
+    with _lock:
+        if _geracoes[tabela] == geracao_lida:
+            _caches[tabela][chave] = valor
+
+
+def obter(tabela, chave, carregar):
+    """Devolve o valor em cache ou chama `carregar()` e guarda o resultado."""
+    valor = buscar(tabela, chave)
+    if valor is not _ausente:
+        return valor
+    geracao_lida = geracao(tabela)
+    valor = carregar()
+    guardar(tabela, chave, valor, geracao_lida)
+    return valor
+
+
+def invalidar(*nomes):
+    """Registra escrita nas tabelas: muda a versão delas e limpa o cache, se houver."""
+    with _lock:
+        for tabela in nomes or set(tabelas) | set(_versoes):
+            _versoes[tabela] = _versoes.get(tabela, 0) + 1
+            if tabela in _caches:
+                _caches[tabela].clear()
+                _geracoes[tabela] += 1
+                _stats[tabela]["invalidations"] += 1
+
+
+def etag(*nomes):
+    with _lock:
+        versoes = '.'.join(str(_versoes.get(tabela, 0)) for tabela in nomes)
+    return f"{_instancia}-{versoes}-{int(time.time() // etag_max_age)}"
+
+
+def reiniciar_processo():
+    """
+    Chamado em cada processo filho após um fork: limpa os caches herdados e troca o
+    token de instância, já que as versões das tabelas passam a evoluir separadamente.
+    """
+    global _instancia
+    with _lock:
+        _instancia = os.urandom(4).hex()
+        for tabela in tabelas:
+            _caches[tabela].clear()
+            _geracoes[tabela] += 1
+
+
+def estatisticas():
+    with _lock:
+        return {
+            tabela: dict(_stats[tabela], size=len(_caches[tabela]), maxsize=cache_maxsize, ttl=cache_ttl)
+            for tabela in tabelas
+        }
+
+
+def cached(tabela):
+    """Cacheia respostas 200 de um GET do flask-restx pela URL completa (caminho + query string)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            chave = (func.__qualname__, request.full_path)
+            valor = buscar(tabela, chave)
+            if valor is not _ausente:
+                return valor
+            geracao_lida = geracao(tabela)
+            resultado = func(*args, **kwargs)
+            status = resultado[1] if isinstance(resultado, tuple) and len(resultado) > 1 else 200
+            if status == 200:
+                guardar(tabela, chave, resultado, geracao_lida)
+            return resultado
+        return wrapper
+    return decorator
+
+
+def condicional(*nomes):
+    """
+    Responde 304 Not Modified a um GET cujo If-None-Match bate com a versão atual das
+    tabelas `nomes`, sem consultar o banco; nas demais respostas 200 envia o ETag.
+    Deve ser o decorador mais externo (antes de marshal_with).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tag = etag(*nomes)
+            if request.if_none_match.contains(tag):
+                return Response(status=304, headers={'ETag': f'"{tag}"'})
+            resultado = func(*args, **kwargs)
+            if isinstance(resultado, Response):
+                if resultado.status_code == 200:
+                    resultado.set_etag(tag)
+                return resultado
+            if not isinstance(resultado, tuple):
+                resultado = (resultado, 200)
+            if resultado[1] != 200:
+                return resultado
+            headers = dict(resultado[2]) if len(resultado) > 2 else {}
+            headers['ETag'] = f'"{tag}"'
+            return resultado[0], resultado[1], headers
+        return wrapper
+    return decorator
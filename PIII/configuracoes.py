@@ -0,0 +1,129 @@
+# Configurações da API lidas uma única vez (configdb.json, configcloud.json e
+# configcloud_new.json), com variáveis de ambiente por cima dos arquivos.
+#
+# Ex.: PI2_DB_HOST=10.0.0.5 PI2_DB_PORT=3307 PI2_PROFESSORES_API_KEY=... python main.py
+#
+# Recarga opcional, sem leitura de disco a cada requisição:
+# - PI2_CONFIG_RELOAD=<segundos>: no máximo uma vez por intervalo, compara o mtime dos
+#   arquivos e relê os que mudaram;
+# - kill -HUP <pid>, depois de instalar_sighup(): relê tudo na próxima consulta.
+# Quem depende de uma seção (ex.: o pool de conexões de db.py) se registra com
+# ao_alterar() e é avisado quando ela muda de fato.
+
+import json
+import os
+import signal
+import threading
+import time
+
+diretorio = os.environ.get('PI2_CONFIG_DIR', '.')
+intervalo_recarga = float(os.environ.get('PI2_CONFIG_RELOAD', 0))  # 0 desliga
+
+# seção -> (arquivo, prefixo das variáveis de ambiente)
+secoes = {
+    'db': ('configdb.json', 'PI2_DB_'),
+    'professores': ('configcloud.json', 'PI2_PROFESSORES_'),
+    'disponibilidades': ('configcloud_new.json', 'PI2_DISPONIBILIDADES_'),
+}
+
+
+class Configuracoes:
+
+    def __init__(self, diretorio=diretorio, secoes=secoes, intervalo_recarga=intervalo_recarga):
+        self.diretorio = diretorio
+        self.secoes = secoes
+        self.intervalo_recarga = intervalo_recarga
+        self._lock = threading.RLock()
+        self._valores = {}  # seção -> (mtime do arquivo ou None, valores)
+        self._ouvintes = {}
+        self._proxima_verificacao = 0
+        self._recarga_pedida = False
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, self.secoes[nome][0])
+
+    def _mtime(self, nome):
+        try:
+            return os.stat(self._caminho(nome)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _ler(self, nome):
+        caminho = self._caminho(nome)
+        mtime = self._mtime(nome)
+        valores = {}
+        if mtime is not None:
+            with open(caminho) as f:
+                valores = json.load(f)
+        prefixo = self.secoes[nome][1]
+        for variavel, valor in os.environ.items():
+            if variavel.startswith(prefixo):
+                chave = variavel[len(prefixo):].lower()
+                # Mantém o tipo do arquivo (ex.: port é inteiro no configdb.json)
+                valores[chave] = int(valor) if type(valores.get(chave)) is int or chave == 'port' else valor
+        if mtime is None and not valores:
+            raise FileNotFoundError(f"{caminho} não encontrado e nenhuma variável {prefixo}* definida")
+        return mtime, valores
+
+    def secao(self, nome):
+        """Cópia dos valores da seção, lidos do disco só na primeira vez (ou após uma recarga)."""
+        self.verificar()
+        with self._lock:
+            if nome not in self._valores:
+                self._valores[nome] = self._ler(nome)
+            return dict(self._valores[nome][1])
+
+    def ao_alterar(self, nome, callback):
+        """`callback(valores)` é chamado quando uma recarga muda a seção `nome`."""
+        with self._lock:
+            self._ouvintes.setdefault(nome, []).append(callback)
+
+    def recarregar(self):
+        """Relê as seções já carregadas e avisa os ouvintes das que mudaram."""
+        alteradas = []
+        with self._lock:
+            for nome, (_, antigos) in list(self._valores.items()):
+                try:
+                    mtime, valores = self._ler(nome)
+                except (OSError, ValueError) as e:
+                    # Arquivo apagado ou JSON salvo pela metade: mantém a versão anterior
+                    print(f"Configuração '{nome}' não recarregada: {e}")
+                    continue
+                self._valores[nome] = (mtime, valores)
+                if valores != antigos:
+                    alteradas.append((nome, dict(valores), list(self._ouvintes.get(nome, []))))
+        for nome, valores, ouvintes in alteradas:
+            print(f"Configuração '{nome}' recarregada.")
+            for callback in ouvintes:
+                callback(valores)
+        return [nome for nome, _, _ in alteradas]
+
+    def verificar(self):
+        """Recarrega se houve SIGHUP ou se algum arquivo mudou (checado a cada intervalo_recarga)."""
+        if self._recarga_pedida:
+            self._recarga_pedida = False
+            self.recarregar()
+            return
+        if not self.intervalo_recarga:
+            return
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+        self._proxima_verificacao = agora + self.intervalo_recarga
+        with self._lock:
+            mudou = any(self._mtime(nome) != mtime for nome, (mtime, _) in self._valores.items())
+        if mudou:
+            self.recarregar()
+
+    def descartar(self):
+        """Esquece os valores lidos (ex.: em um processo filho após o fork)."""
+        with self._lock:
+            self._valores = {}
+
+    def instalar_sighup(self):
+        """Faz `kill -HUP` pedir uma recarga; só no Unix e a partir da thread principal."""
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, '_recarga_pedida', True))
+
+
+configuracoes = Configuracoes()
@@ -1,60 +1,119 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
 
 st.title("Dashboard de Alocação Acadêmica")
 
-# URL da API
-api_url = 'http://127.0.0.1:5000/dados'  
+# URL da API (cada tabela é baixada de /export/<tabela> no formato Arrow)
+api_base = 'http://127.0.0.1:5000'
+api_url = f'{api_base}/export'
 
-# Requisição para obter dados da API
-response = requests.get(api_url)
+# Tabelas disponíveis para exportação
+tabelas = ['Campus', 'Curso', 'Turno', 'Professores', 'Materia', 'Materia_Curso',
+           'Professor_Materia', 'Disponibilidade', 'Professor_Disponibilidade', 'Turma']
 
-# Verifica se a resposta foi bem-sucedida
-if response.status_code == 200:
-    data = response.json()  # Converte os dados recebidos para JSON
+# Segundos em que uma tabela baixada é reutilizada sem nem perguntar à API
+cache_ttl = 30
 
-    # Assume-se que a API retorna um dicionário de tabelas, onde cada tabela é uma chave com seus dados
-    tabelas = data.keys()
-    tabela_selecionada = st.sidebar.selectbox("Selecione a tabela para visualizar os dados", tabelas)
 
-    # Converte a tabela selecionada em um DataFrame do Pandas
-    df = pd.DataFrame(data[tabela_selecionada])
+# Último ETag e DataFrame de cada tabela, compartilhados entre reruns e sessões
+@st.cache_resource
+def versoes_em_cache():
+    return {}
 
-    # Exibe os dados no Streamlit
-    st.write(f"Tabela: {tabela_selecionada}", df)
 
-    # Visualização de dados específicos com base na tabela
-    if tabela_selecionada == "Curso":
-        st.subheader("Detalhes do Curso")
-        cursos = df['name'].unique()
-        curso_selecionado = st.selectbox("Selecione um curso", cursos)
-        st.write(df[df['name'] == curso_selecionado])
+# Baixa só a tabela pedida, em Arrow IPC (sem parsing de JSON); depois do TTL revalida
+# com If-None-Match e, se a API responder 304, reaproveita o DataFrame já carregado
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def carregar_tabela(tabela):
+    versoes = versoes_em_cache()
+    headers = {}
+    if tabela in versoes:
+        headers['If-None-Match'] = versoes[tabela][0]
+    response = requests.get(f"{api_url}/{tabela}", params={'format': 'arrow'}, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return versoes[tabela][1]
+    response.raise_for_status()
+    df = pa.ipc.open_stream(response.content).read_pandas()
+    if response.headers.get('ETag'):
+        versoes[tabela] = (response.headers['ETag'], df)
+    return df
+
+
+# Resultados já agrupados pela API (/agregados/<nome>), alguns kilobytes em vez da tabela inteira
+@st.cache_data(ttl=cache_ttl, show_spinner=False)
+def carregar_agregado(nome):
+    response = requests.get(f"{api_base}/agregados/{nome}", timeout=30)
+    response.raise_for_status()
+    return pd.DataFrame(response.json()[nome])
+
+
+tabela_selecionada = st.sidebar.selectbox("Selecione a tabela para visualizar os dados", tabelas)
+
+try:
+    # Converte a tabela selecionada em um DataFrame do Pandas (em cache entre reruns)
+    df = carregar_tabela(tabela_selecionada)
+except requests.RequestException as e:
+    st.write('Falha ao conectar-se à API.', e)
+    st.stop()
+
+# Exibe os dados no Streamlit
+st.write(f"Tabela: {tabela_selecionada}", df)
+
+if df.empty:
+    st.stop()
+
+# Visualização de dados específicos com base na tabela
+if tabela_selecionada == "Curso":
+    st.subheader("Detalhes do Curso")
+    cursos = df['name'].unique()
+    curso_selecionado = st.selectbox("Selecione um curso", cursos)
+    st.write(df[df['name'] == curso_selecionado])
+
+elif tabela_selecionada == "Professores":
+    st.subheader("Currículo dos Professores")
+    professores = df['nome'].unique()
+    professor_selecionado = st.selectbox("Selecione um professor", professores)
+    st.write(df[df['nome'] == professor_selecionado][['nome', 'curriculo']])
+
+elif tabela_selecionada == "Materia":
+    st.subheader("Detalhes das Matérias")
+    materias = df['nome'].unique()
+    materia_selecionada = st.selectbox("Selecione uma matéria", materias)
+    st.write(df[df['nome'] == materia_selecionada])
+
+elif tabela_selecionada == "Disponibilidade":
+    st.subheader("Disponibilidade dos Professores")
+    campi = df['campus_id'].unique()
+    campus_selecionado = st.selectbox("Selecione um campus", campi)
+    st.write(df[df['campus_id'] == campus_selecionado])
+
+elif tabela_selecionada == "Turma":
+    st.subheader("Turmas")
+    semestres = df['semestre'].unique()
+    semestre_selecionado = st.selectbox("Selecione um semestre", semestres)
+    st.write(df[df['semestre'] == semestre_selecionado])
+
+# Gráficos com os dados agregados no servidor
+try:
+    if tabela_selecionada == "Disponibilidade":
+        agregado = carregar_agregado('disponibilidade')
+        if not agregado.empty:
+            st.subheader("Professores disponíveis por dia e turno")
+            agregado['horario'] = agregado['dia_da_semana'] + ' ' + agregado['turno']
+            st.bar_chart(agregado.pivot_table(index='horario', columns='campus_id', values='professores', sort=False))
+
+    elif tabela_selecionada == "Turma":
+        agregado = carregar_agregado('turmas')
+        if not agregado.empty:
+            st.subheader("Turmas por semestre e campus")
+            st.bar_chart(agregado.pivot_table(index='semestre', columns='campus_id', values='turmas'))
 
     elif tabela_selecionada == "Professores":
-        st.subheader("Currículo dos Professores")
-        professores = df['nome'].unique()
-        professor_selecionado = st.selectbox("Selecione um professor", professores)
-        st.write(df[df['nome'] == professor_selecionado][['nome', 'curriculo']])
-
-    elif tabela_selecionada == "Materia":
-        st.subheader("Detalhes das Matérias")
-        materias = df['nome'].unique()
-        materia_selecionada = st.selectbox("Selecione uma matéria", materias)
-        st.write(df[df['nome'] == materia_selecionada])
-
-    elif tabela_selecionada == "Disponibilidade":
-        st.subheader("Disponibilidade dos Professores")
-        dias = df['dia_da_semana'].unique()
-        dia_selecionado = st.selectbox("Selecione um dia da semana", dias)
-        st.write(df[df['dia_da_semana'] == dia_selecionado])
-
-    elif tabela_selecionada == "Alocacao":
-        st.subheader("Alocações")
-        data_selecionada = st.date_input("Selecione uma data", value=pd.to_datetime('today'))
-        st.write(df[df['data'] == data_selecionada])
-
-    # Gráfico simples usando os dados da tabela selecionada
-    st.line_chart(df.select_dtypes(include=['number']))
-else:
-    st.write('Falha ao conectar-se à API.', response.status_code)
\ No newline at end of file
+        agregado = carregar_agregado('carga')
+        if not agregado.empty:
+            st.subheader("Turmas por professor")
+            st.bar_chart(agregado.groupby('professor_id')['turmas'].sum())
+except requests.RequestException as e:
+    st.write('Falha ao carregar os gráficos.', e)
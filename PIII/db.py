@@ -1,14 +1,31 @@
 import pymysql
-import json
+import threading
+import time
+from collections import deque
+
+import cache
+import metricas
+from configuracoes import configuracoes
+from disponibilidade import COLUNAS_DISPONIBILIDADE
 
 timeout = 60
 
+# Configurações do pool de conexões
+pool_size = 10          # número máximo de conexões abertas ao mesmo tempo
+pool_timeout = 30       # segundos esperando uma conexão livre antes de desistir
+pool_max_idle = 300     # conexões ociosas há mais tempo que isso são fechadas
+pool_ping_interval = 30 # conexões ociosas há mais tempo que isso recebem ping antes do uso
+
+# Quantidade de linhas por INSERT nas importações em lote
+batch_size = 500
+
 def load_config():
-    with open('configdb.json') as f:
-        return json.load(f)
+    # configdb.json + variáveis PI2_DB_*, lidos uma única vez (ver configuracoes.py)
+    return configuracoes.secao('db')
 
-def get_connection():
-    config = load_config()
+def create_connection(config=None):
+    if config is None:
+        config = load_config()
     connection = pymysql.connect(
         charset="utf8mb4",
         connect_timeout=timeout,
@@ -23,259 +40,579 @@ def get_connection():
     )
     return connection
 
-def insert_data_to_mysql(rows):
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """Proxy de uma conexão do pool; close() devolve a conexão ao pool em vez de fechá-la."""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise pymysql.err.InterfaceError("Conexão já devolvida ao pool")
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cursor(self, *args):
+        # Cada execute() do cursor é medido (duração, linhas e log de consultas lentas)
+        return metricas.CursorMedido(self.__getattr__('cursor')(*args))
+
+    def close(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+
+class ConnectionPool:
+    """Pool limitado e thread-safe de conexões pymysql."""
+
+    def __init__(self, creator, max_size=pool_size, checkout_timeout=pool_timeout,
+                 max_idle=pool_max_idle, ping_interval=pool_ping_interval):
+        self._creator = creator
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (conexão, momento em que foi devolvida)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "wait_time": 0.0,
+        }
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        connection = None
+        idle_since = None
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    # LIFO: reaproveita a conexão usada mais recentemente
+                    connection, idle_since = self._idle.pop()
+                    break
+                if self._in_use + len(self._idle) < self.max_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"Nenhuma conexão livre após {self.checkout_timeout}s")
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += time.monotonic() - start
+
+        try:
+            if connection is not None and not self._is_healthy(connection, idle_since):
+                self._close(connection)
+                connection = None
+            if connection is None:
+                connection = self._creator()
+                with self._cond:
+                    self._stats["created"] += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        # Desfaz qualquer transação pendente para não vazar estado entre requisições
+        # Depois de close_all() as conexões devolvidas são fechadas em vez de reaproveitadas
+        reusable = connection.open and not self._closed
+        if reusable:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+        if not reusable:
+            self._close(connection)
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["max_size"] = self.max_size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._in_use
+            stats["size"] = self._in_use + len(self._idle)
+        return stats
+
+    def _is_healthy(self, connection, idle_since):
+        if not connection.open:
+            return False
+        if time.monotonic() - idle_since < self.ping_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def _evict_idle(self):
+        # Chamado com o lock adquirido; as mais antigas ficam no início da fila
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            connection, _ = self._idle.popleft()
+            self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = load_config()
+                _pool = ConnectionPool(lambda: create_connection(config))
+    return _pool
+
+def reset_pool():
+    """
+    Descarta o pool herdado do processo pai após um fork, sem fechar as conexões
+    (o socket é o mesmo do pai); a próxima get_connection() cria um pool novo.
+    """
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def _rebuild_pool(config):
+    # Configuração do banco mudou: as próximas requisições usam um pool novo; as conexões
+    # antigas ociosas são fechadas agora e as em uso, quando forem devolvidas
+    global _pool, _ids_consecutivos
+    with _pool_lock:
+        old, _pool = _pool, None
+        _ids_consecutivos = False  # pode ser outro servidor
+    if old is not None:
+        old.close_all()
+
+configuracoes.ao_alterar('db', _rebuild_pool)
+
+def get_pool_stats():
+    return get_pool().stats()
+
+def get_connection():
+    configuracoes.verificar()
+    inicio = time.perf_counter()
+    try:
+        return get_pool().acquire()
+    finally:
+        metricas.registrar_conexao(time.perf_counter() - inicio)
+
+# Os INSERTs de várias linhas (importações e /turmas/bulk) calculam o id de cada linha
+# como lastrowid + posição. O MySQL gera ids consecutivos para um INSERT ... VALUES com
+# número de linhas conhecido em qualquer innodb_autoinc_lock_mode, mas só quando
+# auto_increment_increment = 1; com incremento maior (réplicas multi-master, Galera)
+# os ids calculados seriam de outras linhas e as chaves estrangeiras ligariam o
+# professor errado. A suposição é conferida uma vez por processo, antes do primeiro lote.
+_ids_consecutivos = False
+
+def verificar_ids_consecutivos(cursor):
+    """Falha (RuntimeError) se o servidor não gera ids consecutivos em um INSERT de várias linhas."""
+    global _ids_consecutivos
+    if _ids_consecutivos:
+        return
+    cursor.execute("SELECT @@auto_increment_increment AS incremento")
+    incremento = int(cursor.fetchone()['incremento'])
+    if incremento != 1:
+        raise RuntimeError(
+            f"auto_increment_increment = {incremento}: as inserções em lote precisam de ids "
+            "consecutivos (auto_increment_increment = 1 nesta conexão)")
+    _ids_consecutivos = True
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def load_materia_ids(cursor):
+    def carregar():
+        cursor.execute("SELECT id, nome FROM Materia")
+        return {m['nome']: m['id'] for m in cursor.fetchall()}
+    return cache.obter('Materia', 'nome->id', carregar)
+
+def load_campus_ids(cursor):
+    def carregar():
+        cursor.execute("SELECT id, nome FROM Campus")
+        return {c['nome']: c['id'] for c in cursor.fetchall()}
+    return cache.obter('Campus', 'nome->id', carregar)
+
+def parse_materias(row):
+    # Matérias vêm separadas por vírgula em `materia3`, `materia4`, `materia5`
+    materias = []
+    for materia_key in ['materia3', 'materia4', 'materia5']:
+        if row.get(materia_key):
+            materias.extend(row[materia_key].split(","))
+    return [m.strip() for m in materias if m.strip()]
+
+def _ids_materias(row, materia_ids, nao_encontradas):
+    ids = set()  # Usar um conjunto para evitar duplicatas
+    for materia in parse_materias(row):
+        materia_id = materia_ids.get(materia)
+        if materia_id is None:
+            nao_encontradas.add(materia)
+        else:
+            ids.add(materia_id)
+    return sorted(ids)
+
+def _inserir_professor_materia(cursor, pares, batch_size):
+    for lote_pares in chunks(pares, batch_size):
+        cursor.executemany(
+            "INSERT INTO Professor_Materia (professor_id, materia_id) VALUES (%s, %s)",
+            lote_pares,
+        )
+
+def _inserir_professores(cursor, rows, materia_ids, nao_encontradas, resumo, batch_size):
+    verificar_ids_consecutivos(cursor)
+    for lote in chunks(list(rows), batch_size):
+        # Inserir os professores do lote em um único INSERT de várias linhas.
+        # O InnoDB atribui ids consecutivos às linhas de um mesmo INSERT,
+        # então o id de cada professor é lastrowid + posição no lote.
+        valores = []
+        for row in lote:
+            valores.extend((row.get('nome', 'N/A'), row.get('curriculo', 'N/A'), row.get('email', 'N/A')))
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(lote))
+        cursor.execute(f"INSERT INTO Professores (nome, curriculo, email) VALUES {placeholders}", valores)
+        primeiro_id = cursor.lastrowid
+        if not primeiro_id:
+            print("Nenhum professor foi inserido.")
+            continue
+        resumo["professores"] += len(lote)
+
+        # Montar os pares Professor_Materia sem consultar o banco
+        pares = []
+        for posicao, row in enumerate(lote):
+            professor_id = primeiro_id + posicao
+            pares.extend((professor_id, materia_id) for materia_id in _ids_materias(row, materia_ids, nao_encontradas))
+        _inserir_professor_materia(cursor, pares, batch_size)
+        resumo["professor_materia"] += len(pares)
+
+def load_professor_ids(cursor):
+    # (nome, email) -> id; com cadastros repetidos vale o mais antigo
+    cursor.execute("SELECT id, nome, email FROM Professores ORDER BY id")
+    professor_ids = {}
+    for p in cursor.fetchall():
+        professor_ids.setdefault((p['nome'], p['email']), p['id'])
+    return professor_ids
+
+def localizar_professor(professor_ids, row, chave_anterior=None):
+    """Professor de uma linha editada: pela chave (nome, email) que a linha tinha antes, senão pela atual."""
+    chave = (row.get('nome', 'N/A'), row.get('email', 'N/A'))
+    if chave_anterior is not None and tuple(chave_anterior) in professor_ids:
+        return professor_ids[tuple(chave_anterior)]
+    return professor_ids.get(chave)
+
+def insert_data_to_mysql(rows, batch_size=batch_size):
+    connection = None
+    resumo = {"professores": 0, "professor_materia": 0, "materias_nao_encontradas": []}
     try:
         connection = get_connection()
         with connection.cursor() as cursor:
-            insert_professor_query = "INSERT INTO Professores (nome, curriculo, email) VALUES (%s, %s, %s)"
-            select_materia_id_query = "SELECT id FROM Materia WHERE nome = %s"
-            insert_professor_materia_query = "INSERT INTO Professor_Materia (professor_id, materia_id) VALUES (%s, %s)"
-            
-            for row in rows:
-                print(f"Processando linha: {row}")
-                print(f"Chaves disponíveis no row: {row.keys()}")
-
-                nome = row.get('nome', 'N/A')
-                curriculo = row.get('curriculo', 'N/A')
-                email = row.get('email', 'N/A')
-                
-                # Inserir o professor
-                cursor.execute(insert_professor_query, (nome, curriculo, email))
-                professor_id = cursor.lastrowid
-
-                if not professor_id:
-                    print("Nenhum professor foi inserido.")
-                    continue
-                
-                print(f"Professor inserido com ID: {professor_id}")
-
-                # Processar matérias de `materia3`, `materia4`, `materia5`
-                materias = []
-                for materia_key in ['materia3', 'materia4', 'materia5']:
-                    if row.get(materia_key):
-                        materias.extend(row[materia_key].split(","))
-
-                materias = [m.strip() for m in materias]  # Remover espaços adicionais
-                print(f"Matérias processadas: {materias}")
-
-                # Buscar IDs das matérias e inserir na tabela Professor_Materia
-                materia_ids = set()  # Usar um conjunto para evitar duplicatas
-                for materia in materias:
-                    cursor.execute(select_materia_id_query, (materia,))
-                    result = cursor.fetchone()
-                    print(f"Resultado da busca por matéria: {result}")
-                    
-                    # Verifica se o resultado é um dicionário e acessa o ID corretamente
-                    if result and 'id' in result:
-                        materia_id = result['id']  # ID da matéria encontrada
-                        print(f"ID da matéria encontrada: {materia_id} para {materia}")
-
-                        # Adicionar o materia_id ao conjunto para inserção
-                        materia_ids.add(materia_id)
-                    else:
-                        print(f"Materia não encontrada: {materia}")
-
-                # Inserir Professor_Materia para cada materia_id único
-                for materia_id in materia_ids:
-                    try:
-                        cursor.execute(insert_professor_materia_query, (professor_id, materia_id))
-                        print(f"Inserido Professor_Materia: professor_id={professor_id}, materia_id={materia_id}")
-                    except Exception as e:
-                        print(f"Erro ao inserir Professor_Materia: {e}")
-                        print(f"Dados que causaram o erro: professor_id={professor_id}, materia_id={materia_id}")
+            # Carregar o mapa nome -> id das matérias uma única vez
+            materia_ids = load_materia_ids(cursor)
+            nao_encontradas = set()
+            _inserir_professores(cursor, rows, materia_ids, nao_encontradas, resumo, batch_size)
 
             connection.commit()  # Commit após todas as inserções
-            print("Todas as inserções foram confirmadas.")
-    
+            cache.invalidar('Professores', 'Professor_Materia')
+            resumo["materias_nao_encontradas"] = sorted(nao_encontradas)
+            print(f"Inseridos {resumo['professores']} professores e {resumo['professor_materia']} relações Professor_Materia.")
+            if nao_encontradas:
+                print(f"Matérias não encontradas: {resumo['materias_nao_encontradas']}")
+
     except Exception as e:
         print(f"Erro ao inserir dados no banco de dados: {e}")
+        resumo["erro"] = str(e)
         print(f"Tipo de erro: {type(e).__name__}")
         if hasattr(e, 'args'):
             print(f"Código do erro: {e.args}")
-    
+
     finally:
         if connection:
-            connection.close()  # Garantir que a conexão seja fechada
+            connection.close()  # Devolver a conexão ao pool
+
+    return resumo
+
+def update_data_in_mysql(alteradas, batch_size=batch_size):
+    """
+    Reaplica linhas editadas da planilha de professores: `alteradas` é uma lista de
+    (chave (nome, email) que a linha tinha antes ou None, linha). O professor é
+    atualizado no lugar e suas matérias são trocadas; linhas sem professor
+    correspondente são inseridas como novas, tudo na mesma transação.
+    """
+    connection = None
+    resumo = {"professores": 0, "professores_atualizados": 0, "professor_materia": 0, "materias_nao_encontradas": []}
+    try:
+        connection = get_connection()
+        with connection.cursor() as cursor:
+            materia_ids = load_materia_ids(cursor)
+            professor_ids = load_professor_ids(cursor)
+            nao_encontradas = set()
+
+            atualizacoes = {}  # professor_id -> linha (a última edição vence)
+            novas = []
+            for chave_anterior, row in alteradas:
+                professor_id = localizar_professor(professor_ids, row, chave_anterior)
+                if professor_id is None:
+                    novas.append(row)
+                else:
+                    atualizacoes[professor_id] = row
+
+            ids = sorted(atualizacoes)
+            cursor.executemany(
+                "UPDATE Professores SET nome = %s, curriculo = %s, email = %s WHERE id = %s",
+                [(atualizacoes[i].get('nome', 'N/A'), atualizacoes[i].get('curriculo', 'N/A'),
+                  atualizacoes[i].get('email', 'N/A'), i) for i in ids],
+            )
+            for lote in chunks(ids, batch_size):
+                cursor.execute(
+                    f"DELETE FROM Professor_Materia WHERE professor_id IN ({', '.join(['%s'] * len(lote))})", lote)
+            pares = [(i, materia_id) for i in ids
+                     for materia_id in _ids_materias(atualizacoes[i], materia_ids, nao_encontradas)]
+            _inserir_professor_materia(cursor, pares, batch_size)
+            resumo["professores_atualizados"] = len(ids)
+            resumo["professor_materia"] = len(pares)
+
+            _inserir_professores(cursor, novas, materia_ids, nao_encontradas, resumo, batch_size)
 
+            connection.commit()
+            cache.invalidar('Professores', 'Professor_Materia')
+            resumo["materias_nao_encontradas"] = sorted(nao_encontradas)
+            print(f"Atualizados {resumo['professores_atualizados']} professores "
+                  f"({resumo['professores']} novos, {resumo['professor_materia']} relações Professor_Materia).")
 
-def insert_disponibilidade_to_mysql(data):
+    except Exception as e:
+        print(f"Erro ao atualizar dados no banco de dados: {e}")
+        resumo["erro"] = str(e)
+
+    finally:
+        if connection:
+            connection.close()
+
+    return resumo
+
+
+# Mapeamento dos dias do formulário para os prefixos das colunas de Disponibilidade
+day_mapping = {
+    'Segunda': 'seg',
+    'Terça': 'ter',
+    'Quarta': 'quar',
+    'Quinta': 'quin',
+    'Sexta': 'sex',
+}
+
+# Campos do formulário com os dias de manhã/tarde/noite e a observação de cada campus
+campos_por_campus = {
+    'Asa Norte': ('diasdemanha', 'diasdetarde', 'diasdenoite', 'observacao1'),
+    'Taguatinga': ('diasdemanha2', 'diasdetarde2', 'diasdenoite3', 'observacao2'),
+}
+
+disponibilidade_fields = ['professor_id', 'turno_id', 'campus_id', 'consideracoes'] + COLUNAS_DISPONIBILIDADE
+
+def parse_disponibilidade(data, campus):
+    """Converte os campos do formulário de um campus em (colunas de horário, dias inválidos)."""
+    campo_manha, campo_tarde, campo_noite, campo_observacao = campos_por_campus[campus]
+    horarios = dict.fromkeys(COLUNAS_DISPONIBILIDADE, 0)
+    horarios['consideracoes'] = data.get(campo_observacao, '')
+    invalidos = []
+    for turno, campo in (('manha', campo_manha), ('tarde', campo_tarde), ('noite', campo_noite)):
+        dias = data.get(campo, '')
+        if not dias or dias == 'N/A':
+            continue
+        for dia in (d.strip() for d in dias.split(',')):
+            field_prefix = day_mapping.get(dia)
+            if field_prefix:
+                horarios[f"{field_prefix}{turno}"] = 1
+            else:
+                invalidos.append(f"{dia} ({turno})")
+    return horarios, invalidos
+
+def _inserir_disponibilidades(cursor, rows, professor_ids, campus_ids, resumo, batch_size):
+    erros = resumo["erros"]
+    # Validar as linhas e montar os registros sem tocar no banco
+    registros = []  # (linha, chave do professor, colunas de Disponibilidade)
+    for linha, data in enumerate(rows):
+        chave = (data.get('nome', 'N/A'), data.get('email', 'N/A'))
+        campus = data.get('campus', 'N/A')
+        campus_list = [c.strip() for c in campus.split(',')] if campus and campus != 'N/A' else []
+        if not campus_list:
+            erros.append({"linha": linha, "erro": "Nenhum campus informado"})
+        for c in campus_list:
+            if c not in campus_ids:
+                erros.append({"linha": linha, "erro": f"Campus não encontrado: {c}"})
+                continue
+            if c not in campos_por_campus:
+                erros.append({"linha": linha, "erro": f"Campus desconhecido: {c}"})
+                continue
+            horarios, invalidos = parse_disponibilidade(data, c)
+            for dia in invalidos:
+                erros.append({"linha": linha, "erro": f"Dia inválido ignorado: {dia}"})
+            horarios['campus_id'] = campus_ids[c]
+            horarios['turno_id'] = None
+            registros.append((linha, chave, horarios))
+
+    verificar_ids_consecutivos(cursor)
+    # Inserir de uma vez os professores que ainda não existem
+    novos = list(dict.fromkeys(chave for _, chave, _ in registros if chave not in professor_ids))
+    for lote in chunks(novos, batch_size):
+        placeholders = ', '.join(['(%s, %s)'] * len(lote))
+        cursor.execute(f"INSERT INTO Professores (nome, email) VALUES {placeholders}",
+                       [valor for chave in lote for valor in chave])
+        for posicao, chave in enumerate(lote):
+            professor_ids[chave] = cursor.lastrowid + posicao
+    resumo["professores_criados"] = len(novos)
+
+    insert_disponibilidade_query = (
+        f"INSERT INTO Disponibilidade ({', '.join(disponibilidade_fields)}) VALUES "
+    )
+    row_placeholders = '(' + ', '.join(['%s'] * len(disponibilidade_fields)) + ')'
+    insert_professor_disponibilidade_query = (
+        "INSERT INTO Professor_Disponibilidade (professor_id, disponibilidade_id) VALUES (%s, %s)"
+    )
+
+    for lote in chunks(registros, batch_size):
+        valores = []
+        for _, chave, horarios in lote:
+            horarios['professor_id'] = professor_ids[chave]
+            valores.append([horarios[f] for f in disponibilidade_fields])
+
+        # Tenta o lote inteiro; se falhar, refaz linha a linha para isolar os erros
+        cursor.execute("SAVEPOINT lote_disponibilidade")
+        try:
+            cursor.execute(insert_disponibilidade_query + ', '.join([row_placeholders] * len(lote)),
+                           [v for linha_valores in valores for v in linha_valores])
+            primeiro_id = cursor.lastrowid
+            inseridos = [(lote[i][2]['professor_id'], primeiro_id + i) for i in range(len(lote))]
+        except pymysql.MySQLError:
+            cursor.execute("ROLLBACK TO SAVEPOINT lote_disponibilidade")
+            inseridos = []
+            for (linha, _, horarios), linha_valores in zip(lote, valores):
+                cursor.execute("SAVEPOINT linha_disponibilidade")
+                try:
+                    cursor.execute(insert_disponibilidade_query + row_placeholders, linha_valores)
+                    inseridos.append((horarios['professor_id'], cursor.lastrowid))
+                except pymysql.MySQLError as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT linha_disponibilidade")
+                    erros.append({"linha": linha, "erro": f"Erro ao inserir disponibilidade: {e}"})
+
+        cursor.executemany(insert_professor_disponibilidade_query, inseridos)
+        resumo["disponibilidades"] += len(inseridos)
+
+
+def insert_disponibilidades_to_mysql(rows, batch_size=batch_size):
+    connection = None
+    resumo = {"disponibilidades": 0, "professores_criados": 0, "erros": []}
+    erros = resumo["erros"]
     try:
-        print("Iniciando a inserção de disponibilidade no MySQL")
-        print(f"Dados recebidos: {data}")
         connection = get_connection()
-        print("Conexão com o banco de dados estabelecida")
         with connection.cursor() as cursor:
-            # Extrair informações do professor
-            nome = data.get('nome', 'N/A')
-            email = data.get('email', 'N/A')
-            print(f"Nome do professor: {nome}, Email: {email}")
-
-            # Buscar o professor na tabela Professores
-            select_professor_query = "SELECT id FROM Professores WHERE nome = %s AND email = %s"
-            cursor.execute(select_professor_query, (nome, email))
-            professor_result = cursor.fetchone()
-            print(f"Resultado da busca do professor: {professor_result}")
-            if professor_result:
-                professor_id = professor_result['id']
-                print(f"Professor encontrado com ID: {professor_id}")
-            else:
-                # Inserir novo professor se não encontrado
-                insert_professor_query = "INSERT INTO Professores (nome, email) VALUES (%s, %s)"
-                cursor.execute(insert_professor_query, (nome, email))
-                professor_id = cursor.lastrowid
-                print(f"Novo professor inserido com ID: {professor_id}")
-
-            # Processar informações do campus
-            campus = data.get('campus', 'N/A')
-            print(f"Campus recebido: {campus}")
-            campus_list = [c.strip() for c in campus.split(',')] if campus != 'N/A' else []
-            print(f"Lista de campus: {campus_list}")
-
-            # Mapeamento dos dias para os campos correspondentes na tabela
-            day_mapping = {
-                'Segunda': 'seg',
-                'Terça': 'ter',
-                'Quarta': 'quar',
-                'Quinta': 'quin',
-                'Sexta': 'sex',
-            }
-
-            # Para cada campus, processar dados de disponibilidade
-            for c in campus_list:
-                print(f"Processando dados para o campus: {c}")
-                disponibilidade_data = {
-                    'professor_id': professor_id,
-                    'turno_id': None,  # Supondo que turno_id é opcional ou pode ser NULL
-                    'campus_id': None,  # Será definido após buscar na tabela Campus
-                    'consideracoes': '',
-                    'segmanha': 0,
-                    'termanha': 0,
-                    'quarmanha': 0,
-                    'quinmanha': 0,
-                    'sexmanha': 0,
-                    'segtarde': 0,
-                    'tertarde': 0,
-                    'quartarde': 0,
-                    'quintarde': 0,
-                    'sextarde': 0,
-                    'segnoite': 0,
-                    'ternoite': 0,
-                    'quarnoite': 0,
-                    'quinnoite': 0,
-                    'sexnoite': 0,
-                }
-
-                # Buscar campus_id na tabela Campus
-                select_campus_query = "SELECT id FROM Campus WHERE nome = %s"
-                cursor.execute(select_campus_query, (c,))
-                campus_result = cursor.fetchone()
-                print(f"Resultado da busca do campus: {campus_result}")
-                if campus_result:
-                    campus_id = campus_result['id']
-                    disponibilidade_data['campus_id'] = campus_id
-                    print(f"Campus encontrado com ID: {campus_id}")
-                else:
-                    # Tratar erro: Campus não encontrado
-                    print(f"Campus não encontrado: {c}")
-                    continue  # Pular para o próximo campus
-
-                # Para "Asa Norte", usar os campos sem sufixo
-                if c == 'Asa Norte':
-                    dias_manha = data.get('diasdemanha', '')
-                    dias_tarde = data.get('diasdetarde', '')
-                    dias_noite = data.get('diasdenoite', '')
-                    observacao = data.get('observacao1', '')
-                    print(f"Dias de manhã: {dias_manha}")
-                    print(f"Dias de tarde: {dias_tarde}")
-                    print(f"Dias de noite: {dias_noite}")
-                    print(f"Observação: {observacao}")
-                # Para "Taguatinga", usar os campos com sufixo 2/3
-                elif c == 'Taguatinga':
-                    dias_manha = data.get('diasdemanha2', '')
-                    dias_tarde = data.get('diasdetarde2', '')
-                    dias_noite = data.get('diasdenoite3', '')
-                    observacao = data.get('observacao2', '')
-                    print(f"Dias de manhã: {dias_manha}")
-                    print(f"Dias de tarde: {dias_tarde}")
-                    print(f"Dias de noite: {dias_noite}")
-                    print(f"Observação: {observacao}")
-                else:
-                    # Campus desconhecido
-                    print(f"Campus desconhecido: {c}")
-                    continue
-
-                disponibilidade_data['consideracoes'] = observacao
-
-                # Processar disponibilidade de manhã
-                if dias_manha and dias_manha != 'N/A':
-                    dias_manha_list = [d.strip() for d in dias_manha.split(',')]
-                    print(f"Lista de dias de manhã: {dias_manha_list}")
-                    for dia in dias_manha_list:
-                        field_prefix = day_mapping.get(dia)
-                        if field_prefix:
-                            field_name = f"{field_prefix}manha"
-                            disponibilidade_data[field_name] = 1
-                            print(f"Disponibilidade manhã atualizada: {field_name} = 1")
-                        else:
-                            print(f"Dia inválido encontrado na manhã: {dia}")
-
-                # Processar disponibilidade de tarde
-                if dias_tarde and dias_tarde != 'N/A':
-                    dias_tarde_list = [d.strip() for d in dias_tarde.split(',')]
-                    print(f"Lista de dias de tarde: {dias_tarde_list}")
-                    for dia in dias_tarde_list:
-                        field_prefix = day_mapping.get(dia)
-                        if field_prefix:
-                            field_name = f"{field_prefix}tarde"
-                            disponibilidade_data[field_name] = 1
-                            print(f"Disponibilidade tarde atualizada: {field_name} = 1")
-                        else:
-                            print(f"Dia inválido encontrado na tarde: {dia}")
-
-                # Processar disponibilidade de noite
-                if dias_noite and dias_noite != 'N/A':
-                    dias_noite_list = [d.strip() for d in dias_noite.split(',')]
-                    print(f"Lista de dias de noite: {dias_noite_list}")
-                    for dia in dias_noite_list:
-                        field_prefix = day_mapping.get(dia)
-                        if field_prefix:
-                            field_name = f"{field_prefix}noite"
-                            disponibilidade_data[field_name] = 1
-                            print(f"Disponibilidade noite atualizada: {field_name} = 1")
-                        else:
-                            print(f"Dia inválido encontrado na noite: {dia}")
-
-                print(f"Dados de disponibilidade a serem inseridos: {disponibilidade_data}")
-                # Inserir disponibilidade_data na tabela Disponibilidade
-                fields = ', '.join(disponibilidade_data.keys())
-                placeholders = ', '.join(['%s'] * len(disponibilidade_data))
-                values = list(disponibilidade_data.values())
-                insert_disponibilidade_query = f"INSERT INTO Disponibilidade ({fields}) VALUES ({placeholders})"
-                cursor.execute(insert_disponibilidade_query, values)
-                disponibilidade_id = cursor.lastrowid
-                print(f"Disponibilidade inserida com ID: {disponibilidade_id}")
-
-                # Inserir na tabela Professor_Disponibilidade
-                insert_professor_disponibilidade_query = """
-                    INSERT INTO Professor_Disponibilidade (professor_id, disponibilidade_id)
-                    VALUES (%s, %s)
-                """
-                cursor.execute(insert_professor_disponibilidade_query, (professor_id, disponibilidade_id))
-                print("Relação Professor_Disponibilidade inserida com sucesso")
+            # Mapas de busca carregados uma única vez para todo o lote
+            professor_ids = load_professor_ids(cursor)
+            campus_ids = load_campus_ids(cursor)
+            _inserir_disponibilidades(cursor, rows, professor_ids, campus_ids, resumo, batch_size)
 
             # Confirmar a transação
             connection.commit()
-            print("Dados inseridos com sucesso.")
+            cache.invalidar('Professores', 'Disponibilidade', 'Professor_Disponibilidade')
+            print(f"Inseridas {resumo['disponibilidades']} disponibilidades "
+                  f"({resumo['professores_criados']} professores novos, {len(erros)} erros).")
 
     except Exception as e:
         print(f"Erro ao inserir dados: {e}")
+        erros.append({"linha": None, "erro": f"Lote abortado: {e}"})
     finally:
         if connection:
             connection.close()
-            print("Conexão com o banco de dados fechada")
 
+    return resumo
 
 
+def update_disponibilidades_in_mysql(alteradas, batch_size=batch_size):
+    """
+    Reaplica linhas editadas do formulário de disponibilidade: `alteradas` é uma lista
+    de (chave (nome, email) anterior ou None, linha). As disponibilidades do professor
+    são apagadas e a linha é importada de novo, na mesma transação, para que horários
+    removidos no formulário deixem de valer.
+    """
+    connection = None
+    resumo = {"disponibilidades": 0, "disponibilidades_removidas": 0, "professores_criados": 0, "erros": []}
+    erros = resumo["erros"]
+    try:
+        connection = get_connection()
+        with connection.cursor() as cursor:
+            professor_ids = load_professor_ids(cursor)
+            campus_ids = load_campus_ids(cursor)
+
+            ids = set()
+            for chave_anterior, row in alteradas:
+                professor_id = localizar_professor(professor_ids, row, chave_anterior)
+                if professor_id is not None:
+                    ids.add(professor_id)
+                    # Nome/e-mail corrigidos no formulário continuam apontando para o mesmo professor
+                    professor_ids.setdefault((row.get('nome', 'N/A'), row.get('email', 'N/A')), professor_id)
+            ids = sorted(ids)
+            for lote in chunks(ids, batch_size):
+                placeholders = ', '.join(['%s'] * len(lote))
+                cursor.execute(f"DELETE FROM Professor_Disponibilidade WHERE professor_id IN ({placeholders})", lote)
+                resumo["disponibilidades_removidas"] += cursor.execute(
+                    f"DELETE FROM Disponibilidade WHERE professor_id IN ({placeholders})", lote)
+            _inserir_disponibilidades(cursor, [row for _, row in alteradas], professor_ids, campus_ids, resumo,
+                                      batch_size)
+
+            connection.commit()
+            cache.invalidar('Professores', 'Disponibilidade', 'Professor_Disponibilidade')
+            print(f"Reimportadas {resumo['disponibilidades']} disponibilidades "
+                  f"({resumo['disponibilidades_removidas']} removidas, {len(erros)} erros).")
+
+    except Exception as e:
+        print(f"Erro ao atualizar disponibilidades: {e}")
+        erros.append({"linha": None, "erro": f"Lote abortado: {e}"})
+    finally:
+        if connection:
+            connection.close()
 
+    return resumo
 
 
+def insert_disponibilidade_to_mysql(data):
+    return insert_disponibilidades_to_mysql([data])
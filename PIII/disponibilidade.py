@@ -0,0 +1,116 @@
+# Índice de disponibilidade em memória.
+# Cada professor tem, por campus, uma máscara de 15 bits (5 dias x 3 turnos),
+# então as consultas de horário viram operações bit a bit.
+
+DIAS_DA_SEMANA = ['seg', 'ter', 'quar', 'quin', 'sex']
+TURNOS = ['manha', 'tarde', 'noite']
+
+# Mesma ordem das colunas da tabela Disponibilidade (segmanha ... sexnoite)
+COLUNAS_DISPONIBILIDADE = [f"{dia}{turno}" for turno in TURNOS for dia in DIAS_DA_SEMANA]
+
+BIT_POR_COLUNA = {coluna: 1 << i for i, coluna in enumerate(COLUNAS_DISPONIBILIDADE)}
+
+TODOS_OS_HORARIOS = (1 << len(COLUNAS_DISPONIBILIDADE)) - 1
+
+
+# Turma guarda 'quinta' enquanto as colunas de Disponibilidade usam 'quin'
+def coluna_dia_turno(dia_da_semana, turno):
+    dia = dia_da_semana.lower()
+    if dia == 'quinta':
+        dia = 'quin'
+    return f"{dia}{turno.lower()}"
+
+
+def bit_horario(dia_da_semana, turno):
+    coluna = coluna_dia_turno(dia_da_semana, turno)
+    if coluna not in BIT_POR_COLUNA:
+        raise ValueError(f"Horário inválido: {dia_da_semana}/{turno}")
+    return BIT_POR_COLUNA[coluna]
+
+
+def empacotar(row):
+    """Converte as 15 colunas booleanas de uma linha de Disponibilidade em uma máscara."""
+    mascara = 0
+    for coluna, bit in BIT_POR_COLUNA.items():
+        if row.get(coluna):
+            mascara |= bit
+    return mascara
+
+
+def desempacotar(mascara):
+    return {coluna: bool(mascara & bit) for coluna, bit in BIT_POR_COLUNA.items()}
+
+
+def contar_horarios(mascara):
+    return bin(mascara).count('1')
+
+
+class IndiceDisponibilidade:
+    """Máscaras de disponibilidade por (campus_id, professor_id)."""
+
+    def __init__(self):
+        self._por_campus = {}  # campus_id -> {professor_id: máscara}
+
+    @classmethod
+    def from_rows(cls, rows):
+        indice = cls()
+        for row in rows:
+            indice.adicionar(row['professor_id'], row['campus_id'], empacotar(row))
+        return indice
+
+    @classmethod
+    def carregar(cls, cursor, professor_ids=None, campus_id=None):
+        """Monta o índice a partir da tabela Disponibilidade, opcionalmente filtrada."""
+        query = f"SELECT professor_id, campus_id, {', '.join(COLUNAS_DISPONIBILIDADE)} FROM Disponibilidade"
+        condicoes = []
+        parametros = []
+        if campus_id is not None:
+            condicoes.append("campus_id = %s")
+            parametros.append(campus_id)
+        if professor_ids is not None:
+            if not professor_ids:
+                return cls()
+            condicoes.append(f"professor_id IN ({', '.join(['%s'] * len(professor_ids))})")
+            parametros.extend(professor_ids)
+        if condicoes:
+            query += " WHERE " + " AND ".join(condicoes)
+        cursor.execute(query, parametros)
+        return cls.from_rows(cursor.fetchall())
+
+    def adicionar(self, professor_id, campus_id, mascara):
+        # Um professor pode ter mais de uma linha por campus; os horários se somam
+        professores = self._por_campus.setdefault(campus_id, {})
+        professores[professor_id] = professores.get(professor_id, 0) | mascara
+
+    def mascara(self, professor_id, campus_id):
+        return self._por_campus.get(campus_id, {}).get(professor_id, 0)
+
+    def campi(self):
+        return list(self._por_campus)
+
+    def professores(self, campus_id):
+        return dict(self._por_campus.get(campus_id, {}))
+
+    def esta_disponivel(self, professor_id, campus_id, dia_da_semana, turno):
+        return bool(self.mascara(professor_id, campus_id) & bit_horario(dia_da_semana, turno))
+
+    def disponiveis(self, campus_id, dia_da_semana, turno, candidatos=None):
+        """Professores livres no campus/dia/turno, restritos a `candidatos` se informado."""
+        bit = bit_horario(dia_da_semana, turno)
+        professores = self._por_campus.get(campus_id, {})
+        if candidatos is None:
+            return sorted(p for p, m in professores.items() if m & bit)
+        return sorted(p for p in set(candidatos) if professores.get(p, 0) & bit)
+
+    def sobreposicao(self, professor_a, professor_b, campus_id):
+        """Quantidade de horários em comum entre dois professores no campus."""
+        return contar_horarios(self.mascara(professor_a, campus_id) & self.mascara(professor_b, campus_id))
+
+    def contagem_por_horario(self, campus_id):
+        """Quantos professores estão livres em cada horário do campus."""
+        contagem = dict.fromkeys(COLUNAS_DISPONIBILIDADE, 0)
+        for mascara in self._por_campus.get(campus_id, {}).values():
+            for coluna, bit in BIT_POR_COLUNA.items():
+                if mascara & bit:
+                    contagem[coluna] += 1
+        return contagem
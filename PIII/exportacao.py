@@ -0,0 +1,139 @@
+# Exportação colunar (CSV, Arrow IPC ou Parquet) lida direto do cursor, em blocos.
+# O pyarrow é opcional: sem ele apenas o formato CSV fica disponível.
+
+import csv
+import io
+
+from pymysql.constants import FIELD_TYPE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+formatos = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def pyarrow_disponivel():
+    return pa is not None
+
+
+def _tipo_arrow(type_code):
+    # Tipos não mapeados são exportados como texto
+    inteiros = {
+        FIELD_TYPE.TINY: pa.int16(),
+        FIELD_TYPE.SHORT: pa.int32(),
+        FIELD_TYPE.INT24: pa.int64(),
+        FIELD_TYPE.LONG: pa.int64(),
+        FIELD_TYPE.LONGLONG: pa.int64(),
+        FIELD_TYPE.YEAR: pa.int16(),
+    }
+    if type_code in inteiros:
+        return inteiros[type_code]
+    if type_code == FIELD_TYPE.FLOAT:
+        return pa.float32()
+    if type_code == FIELD_TYPE.DOUBLE:
+        return pa.float64()
+    if type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE):
+        return pa.date32()
+    if type_code in (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def schema_do_cursor(cursor):
+    """Schema Arrow a partir de cursor.description, sem depender dos valores da primeira linha."""
+    return pa.schema([pa.field(coluna[0], _tipo_arrow(coluna[1])) for coluna in cursor.description])
+
+
+class _Coletor(io.RawIOBase):
+    """Destino de escrita que acumula os bytes até serem drenados, mantendo a posição total."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _lotes(cursor, tamanho):
+    while True:
+        rows = cursor.fetchmany(tamanho)
+        if not rows:
+            return
+        yield rows
+
+
+def gerar_csv(cursor, tamanho):
+    colunas = [coluna[0] for coluna in cursor.description]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+    for rows in _lotes(cursor, tamanho):
+        writer.writerows([row[c] for c in colunas] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _colunas_arrow(rows, schema):
+    colunas = {}
+    for campo in schema:
+        valores = [row[campo.name] for row in rows]
+        if pa.types.is_string(campo.type):
+            valores = [v if v is None or isinstance(v, str) else _texto(v) for v in valores]
+        colunas[campo.name] = pa.array(valores, type=campo.type)
+    return pa.table(colunas, schema=schema)
+
+
+def _texto(valor):
+    # Decimal, TIME (timedelta), ENUM/SET etc. viram texto
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('utf-8', errors='replace')
+    return str(valor)
+
+
+def gerar_arrow(cursor, tamanho, formato):
+    """Gera o stream Arrow IPC ou o arquivo Parquet (um row group por bloco)."""
+    schema = schema_do_cursor(cursor)
+    coletor = _Coletor()
+    destino = pa.PythonFile(coletor, mode='w')
+    if formato == 'parquet':
+        writer = pq.ParquetWriter(destino, schema)
+    else:
+        writer = pa.ipc.new_stream(destino, schema)
+    try:
+        for rows in _lotes(cursor, tamanho):
+            writer.write_table(_colunas_arrow(rows, schema))
+            yield coletor.drenar()
+    finally:
+        writer.close()
+    yield coletor.drenar()
+
+
+def gerar(cursor, formato, tamanho):
+    if formato == 'csv':
+        return gerar_csv(cursor, tamanho)
+    return gerar_arrow(cursor, tamanho, formato)
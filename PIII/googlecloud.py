@@ -1,62 +1,84 @@
 from googleapiclient.discovery import build
-import json
+import httplib2
+import threading
 from db import insert_data_to_mysql
+from configuracoes import configuracoes
 
-# Função para carregar as configurações do arquivo JSON
+# Serviços do Google Sheets já construídos, por chave de API.
+# O build() analisa o documento de descoberta, então é feito uma única vez.
+_services = {}
+_services_lock = threading.Lock()
+
+# httplib2.Http não é thread-safe: cada thread usa a sua conexão HTTP
+_local = threading.local()
+
+# Configurações da planilha de professores (configcloud.json + PI2_PROFESSORES_*)
 def load_config():
-    with open('configcloud.json') as f:
-        return json.load(f)
+    return configuracoes.secao('professores')
 
-# Function to load configurations for the new spreadsheet
+# Configurations for the new spreadsheet (configcloud_new.json + PI2_DISPONIBILIDADES_*)
 def load_config_new():
-    with open('configcloud_new.json') as f:
-        return json.load(f)
+    return configuracoes.secao('disponibilidades')
 
 
-# Função para obter dados da Google Sheets
-def get_sheet_data():
-    # Carregar configurações
-    config = load_config()
-    
-    # Sua chave de API (vinda do arquivo configcloud.json)
-    API_KEY = config['api_key']
+def _thread_http():
+    if not hasattr(_local, 'http'):
+        _local.http = httplib2.Http()
+    return _local.http
+
+# Retorna o serviço do Google Sheets em cache (ou constrói na primeira chamada).
+# `http` permite usar um stub local (ex.: googleapiclient.http.HttpMockSequence) nos testes.
+def get_service(api_key, http=None):
+    with _services_lock:
+        service = _services.get(api_key)
+        if service is None:
+            service = build('sheets', 'v4', developerKey=api_key, http=http, cache_discovery=False)
+            _services[api_key] = service
+    return service
 
-    # O ID da planilha (extraído da URL da planilha)
-    SPREADSHEET_ID = config['spreadsheet_id']
+def reset_services():
+    with _services_lock:
+        _services.clear()
 
-    # O intervalo de células que você deseja acessar
-    RANGE_NAME = config['range_name']  # Vindo do arquivo de configuração
 
+def _get_values(config, range_name=None, http=None):
     # Conectar ao serviço do Google Sheets
-    service = build('sheets', 'v4', developerKey=API_KEY)
+    service = get_service(config['api_key'], http=http)
 
     # Chamar a API para obter os dados
     sheet = service.spreadsheets()
-    result = sheet.values().get(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute()
-    rows = result.get('values', [])
-
-    return rows
-
-def get_sheet_data_new():
-    # Load configurations
-    config = load_config_new()
-    
-    # Your API key (from configcloud_new.json)
-    API_KEY = config['api_key']
-
-    # The new spreadsheet ID
-    SPREADSHEET_ID = config['spreadsheet_id']
-
-    # The cell range you want to access
-    RANGE_NAME = config['range_name']  # From the new config file
-
-    # Connect to the Google Sheets service
-    service = build('sheets', 'v4', developerKey=API_KEY)
-
-    # Call the API to get the data from the new spreadsheet
-    sheet = service.spreadsheets()
-    result = sheet.values().get(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute()
-    rows = result.get('values', [])
-
-    return rows
+    request = sheet.values().get(spreadsheetId=config['spreadsheet_id'],
+                                 range=range_name or config['range_name'])
+    result = request.execute(http=http or _thread_http())
+    return result.get('values', [])
 
+# Função para obter dados da Google Sheets
+def get_sheet_data(range_name=None, http=None):
+    # Carregar configurações (api_key, spreadsheet_id e range_name do configcloud.json)
+    return _get_values(load_config(), range_name, http)
+
+def get_sheet_data_new(range_name=None, http=None):
+    # Load configurations (from configcloud_new.json)
+    return _get_values(load_config_new(), range_name, http)
+
+
+# Busca vários intervalos de uma vez: um único values().batchGet por planilha.
+# `consultas` é um dict nome -> config (api_key, spreadsheet_id, range_name).
+def batch_get_sheet_data(consultas, http=None):
+    por_planilha = {}
+    for nome, config in consultas.items():
+        chave = (config['api_key'], config['spreadsheet_id'])
+        por_planilha.setdefault(chave, []).append((nome, config['range_name']))
+
+    resultados = {}
+    for (api_key, spreadsheet_id), intervalos in por_planilha.items():
+        service = get_service(api_key, http=http)
+        request = service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[range_name for _, range_name in intervalos],
+        )
+        result = request.execute(http=http or _thread_http())
+        # A API devolve os intervalos na mesma ordem em que foram pedidos
+        for (nome, _), value_range in zip(intervalos, result.get('valueRanges', [])):
+            resultados[nome] = value_range.get('values', [])
+    return resultados
@@ -0,0 +1,175 @@
+# Tarefas em segundo plano: importação das planilhas e alocação automática rodam em
+# um pool de threads do próprio processo, sem prender as threads que atendem HTTP.
+# O estado de cada tarefa fica na tabela Job (migrations/002_job.sql), então qualquer
+# worker responde GET /jobs/<id> e o histórico sobrevive a reinícios.
+#
+# Enquanto a tarefa roda, um batimento atualiza atualizado_em a cada heartbeat_interval;
+# uma tarefa pendente/executando sem batimento há mais de heartbeat_timeout (processo
+# morto ou reiniciado no meio) é marcada como 'interrompido' na próxima consulta.
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from alocacao import alocar
+from db import get_connection
+from sync import planilhas, sincronizar_planilhas
+
+job_workers = 2          # tarefas executadas ao mesmo tempo por processo
+heartbeat_interval = 30  # segundos
+heartbeat_timeout = 300  # segundos sem batimento até a tarefa ser dada como interrompida
+progress_interval = 1.0  # intervalo mínimo entre gravações de progresso
+
+# tipo -> função(parametros, progresso) que devolve o resultado (serializável em JSON)
+tarefas = {}
+
+_executor = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix='job')
+_ativos = set()  # ids das tarefas deste processo ainda não finalizadas
+_lock = threading.Lock()
+_batimento = None
+
+_campos_data = ('criado_em', 'iniciado_em', 'atualizado_em', 'finalizado_em')
+
+
+def tarefa(tipo):
+    def decorator(func):
+        tarefas[tipo] = func
+        return func
+    return decorator
+
+
+def _agora():
+    return datetime.now().replace(microsecond=0)
+
+
+def _atualizar(job_id, **campos):
+    atribuicoes = ', '.join(f"{campo} = %s" for campo in campos)
+    with get_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(f"UPDATE Job SET {atribuicoes} WHERE id = %s", [*campos.values(), job_id])
+        connection.commit()
+
+
+class Progresso:
+    """Passado às tarefas como `progresso(feitos, total, mensagem)`; grava no máximo a cada progress_interval."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._ultima_gravacao = 0
+
+    def __call__(self, feitos, total=None, mensagem=None):
+        agora = time.monotonic()
+        final = total is not None and feitos >= total
+        if not final and agora - self._ultima_gravacao < progress_interval:
+            return
+        self._ultima_gravacao = agora
+        _atualizar(self.job_id, progresso=feitos, total=total, mensagem=(mensagem or '')[:255],
+                   atualizado_em=_agora())
+
+
+def _bater():
+    while True:
+        time.sleep(heartbeat_interval)
+        with _lock:
+            ids = sorted(_ativos)
+        if not ids:
+            continue
+        try:
+            with get_connection() as connection, connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE Job SET atualizado_em = %s WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                    [_agora(), *ids],
+                )
+                connection.commit()
+        except Exception as e:
+            print(f"Erro ao atualizar o batimento das tarefas {ids}: {e}")
+
+
+def _iniciar_batimento():
+    # Sob demanda (e de novo em um processo filho, onde a thread herdada não existe)
+    global _batimento
+    if _batimento is None or not _batimento.is_alive():
+        _batimento = threading.Thread(target=_bater, name='job-batimento', daemon=True)
+        _batimento.start()
+
+
+def _executar(job_id, tipo, parametros):
+    try:
+        _atualizar(job_id, status='executando', iniciado_em=_agora(), atualizado_em=_agora())
+        resultado = tarefas[tipo](parametros, Progresso(job_id))
+        _atualizar(job_id, status='concluido', resultado=json.dumps(resultado, ensure_ascii=False, default=str),
+                   finalizado_em=_agora(), atualizado_em=_agora())
+    except Exception as e:
+        print(f"Erro na tarefa {job_id} ({tipo}): {e}")
+        try:
+            _atualizar(job_id, status='erro', erro=repr(e), finalizado_em=_agora(), atualizado_em=_agora())
+        except Exception as erro_gravacao:
+            print(f"Erro ao gravar a falha da tarefa {job_id}: {erro_gravacao}")
+    finally:
+        with _lock:
+            _ativos.discard(job_id)
+
+
+def criar(tipo, parametros):
+    """Registra a tarefa na tabela Job, agenda a execução e devolve o id."""
+    if tipo not in tarefas:
+        raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+    agora = _agora()
+    with get_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO Job (tipo, status, parametros, criado_em, atualizado_em) VALUES (%s, 'pendente', %s, %s, %s)",
+            (tipo, json.dumps(parametros, ensure_ascii=False), agora, agora),
+        )
+        job_id = cursor.lastrowid
+        connection.commit()
+    with _lock:
+        _ativos.add(job_id)
+        _iniciar_batimento()
+    _executor.submit(_executar, job_id, tipo, parametros)
+    return job_id
+
+
+def obter(job_id):
+    """Estado da tarefa (com parâmetros e resultado já decodificados) ou None."""
+    with get_connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM Job WHERE id = %s", (job_id,))
+        job = cursor.fetchone()
+        if job is None:
+            return None
+        with _lock:
+            ativo = job_id in _ativos
+        parado = (_agora() - job['atualizado_em']).total_seconds() > heartbeat_timeout
+        if job['status'] in ('pendente', 'executando') and not ativo and parado:
+            cursor.execute(
+                "UPDATE Job SET status = 'interrompido', finalizado_em = %s WHERE id = %s AND status = %s",
+                (_agora(), job_id, job['status']),
+            )
+            connection.commit()
+            job['status'] = 'interrompido'
+    for campo in ('parametros', 'resultado'):
+        job[campo] = json.loads(job[campo]) if job[campo] else None
+    for campo in _campos_data:
+        if job[campo] is not None:
+            job[campo] = job[campo].isoformat()
+    return job
+
+
+@tarefa('import')
+def _importar(parametros, progresso):
+    nomes = parametros.get('planilhas') or list(planilhas)
+    return {"sync": sincronizar_planilhas(nomes, parametros.get('completo', False), progresso)}
+
+
+@tarefa('alocacao')
+def _alocar(parametros, progresso):
+    with get_connection() as connection:
+        return alocar(
+            connection,
+            semestre=parametros.get('semestre'),
+            manter_existentes=parametros.get('manter_existentes', True),
+            carga_maxima=parametros.get('carga_maxima'),
+            aplicar=parametros.get('aplicar', True),
+            progresso=progresso,
+            processos=parametros.get('processos'),
+        )
@@ -1,10 +1,26 @@
-from flask import Flask, request, jsonify
-from flask_restx import Api, Resource, fields
-from db import get_connection, insert_data_to_mysql, insert_disponibilidade_to_mysql
+import json
+import threading
+import pymysql
+from pymysql.constants import ER
+from cachetools import TTLCache
+from flask import Flask, Response, request, jsonify
+from flask_restx import Api, Resource, fields, marshal
+from db import get_connection, get_pool_stats, insert_data_to_mysql, insert_disponibilidade_to_mysql
 from googlecloud import get_sheet_data
+from disponibilidade import IndiceDisponibilidade, COLUNAS_DISPONIBILIDADE, DIAS_DA_SEMANA, TURNOS
+from alocacao import ProblemaAlocacao, alocar, carga_maxima_valida, numero_de_processos
+from sync import planilhas, sincronizar_planilhas
+import exportacao
+from cache import cache_ttl, cached, condicional, estatisticas, etag, invalidar
+from ocupacao import ocupacao
+from turmas import inserir_turmas, atualizar_turmas
+import metricas
+from configuracoes import configuracoes
+import jobs
 
 # Initialize the Flask application
 app = Flask(__name__)
+metricas.instrumentar(app)
 
 # Initialize the API with Flask-RESTx
 api = Api(app, version='1.0', title='API Documentation',
@@ -20,11 +36,140 @@ def get_db_connection():
         print(f"Error connecting to the database: {e}")
         return None
 
-# Function to safely close the connection
+# Function to safely close the connection (returns it to the pool)
 def close_connection(connection):
     if connection:
         connection.close()
 
+# Pagination limits for list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Query parameters shared by every list endpoint (for Swagger documentation)
+list_params = {
+    'limit': f'Maximum number of rows (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})',
+    'cursor': 'Value of X-Next-Cursor from the previous page',
+    'fields': 'Comma-separated list of fields to return',
+}
+
+# Rows fetched from the unbuffered cursor per streamed chunk
+STREAM_CHUNK_SIZE = 500
+
+# Read ?fields and return the list of output fields (ValueError on unknown ones)
+def campos_pedidos(colunas, padrao=None):
+    campos = padrao or list(colunas)
+    if request.args.get('fields'):
+        campos = [c.strip() for c in request.args['fields'].split(',') if c.strip()]
+        invalidos = [c for c in campos if c not in colunas]
+        if invalidos:
+            raise ValueError(f"Unknown fields: {', '.join(invalidos)}")
+    return campos
+
+# Build the SELECT for a list endpoint with the filters given in the query string.
+# `colunas` maps each output field to its SQL expression and `filtros` maps query params to SQL expressions.
+def montar_consulta(origem, colunas, campos, filtros=None, after=None):
+    condicoes = []
+    parametros = []
+    for param, expressao in (filtros or {}).items():
+        if param in request.args:
+            condicoes.append(f"{expressao} = %s")
+            parametros.append(request.args[param])
+    if after is not None:
+        condicoes.append(f"{colunas['id']} > %s")
+        parametros.append(after)
+
+    query = f"SELECT {', '.join(f'{colunas[c]} AS {c}' for c in campos)} FROM {origem}"
+    if condicoes:
+        query += " WHERE " + " AND ".join(condicoes)
+    query += f" ORDER BY {colunas['id']}"
+    return query, parametros
+
+# Run a list query with keyset pagination (?limit, ?cursor), projection (?fields) and filters.
+# `padrao` lists the fields returned when ?fields is not given.
+# Returns the rows and the response headers; raises ValueError on invalid parameters.
+def listar(cursor, origem, colunas, filtros=None, padrao=None):
+    args = request.args
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        after = int(args['cursor']) if args.get('cursor') else None
+    except ValueError:
+        raise ValueError("'limit' and 'cursor' must be integers.")
+    if limit < 1:
+        raise ValueError("'limit' must be positive.")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    campos = campos_pedidos(colunas, padrao)
+    # The id is always read because it is the pagination key
+    selecionados = campos if 'id' in campos else ['id'] + campos
+    query, parametros = montar_consulta(origem, colunas, selecionados, filtros, after)
+
+    cursor.execute(query + " LIMIT %s", parametros + [limit + 1])
+    rows = cursor.fetchall()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = str(rows[-1]['id'])
+    if 'id' not in campos:
+        for row in rows:
+            del row['id']
+    return rows, headers
+
+# Stream a whole (filtered) list with an unbuffered cursor, without building it in memory.
+# ?stream=ndjson yields one JSON object per line; ?stream=json yields a chunked JSON array.
+def transmitir(origem, colunas, filtros=None, padrao=None):
+    formato = request.args.get('stream')
+    if formato not in ('ndjson', 'json'):
+        return {"message": "The parameter 'stream' must be 'ndjson' or 'json'."}, 400
+    try:
+        campos = campos_pedidos(colunas, padrao)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    query, parametros = montar_consulta(origem, colunas, campos, filtros)
+
+    connection = get_db_connection()
+    if not connection:
+        return {"message": "Unable to connect to the database!"}, 500
+
+    def gerar():
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cursor.execute(query, parametros)
+            primeiro = True
+            if formato == 'json':
+                yield '['
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+                if formato == 'ndjson':
+                    yield ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+                else:
+                    chunk = ','.join(json.dumps(row, default=str) for row in rows)
+                    yield chunk if primeiro else ',' + chunk
+                    primeiro = False
+            if formato == 'json':
+                yield ']'
+        finally:
+            cursor.close()
+            close_connection(connection)
+
+    mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+    response = Response(gerar(), mimetype=mimetype)
+    # HEAD requests (and clients that disconnect early) never start the generator, so its
+    # finally would not run; closing the response returns the connection in every case
+    response.call_on_close(lambda: close_connection(connection))
+    return response
+
+# WHERE clause for the aggregate endpoints from the given query params (plain column names)
+def filtros_agregado(permitidos):
+    condicoes = []
+    parametros = []
+    for param in permitidos:
+        if request.args.get(param):
+            condicoes.append(f"{param} = %s")
+            parametros.append(request.args[param])
+    return ("WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
 # Define models for Swagger documentation
 
 # Campus Model
@@ -120,19 +265,27 @@ turma_model = api.model('Turma', {
     'materia_id': fields.Integer(required=True, description='ID of the subject')
 })
 
+# Columns and filters of the Campus list
+campus_colunas = {'id': 'id', 'nome': 'nome'}
+campus_filtros = {'nome': 'nome'}
+
 # Endpoint for Campus
 @api.route('/campus')
 class CampusList(Resource):
-    @api.marshal_list_with(campus_model)
+    @condicional('Campus')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in campus_filtros}})
+    @api.response(200, 'Success', [campus_model])
+    @cached('Campus')
     def get(self):
         """List all campuses"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                cursor.execute("SELECT * FROM Campus")
-                campuses = cursor.fetchall()
-                return campuses, 200
+                campuses, headers = listar(cursor, "Campus", campus_colunas, campus_filtros)
+                return marshal(campuses, campus_model, mask=request.args.get('fields')), 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving campuses: {e}"}, 500
             finally:
@@ -154,6 +307,7 @@ class CampusList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Campus (nome) VALUES (%s)", (nome,))
                 connection.commit()
+                invalidar('Campus')
                 return {"message": "Campus successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating campus: {e}"}, 500
@@ -164,7 +318,9 @@ class CampusList(Resource):
 
 @api.route('/campus/<int:id>')
 class CampusResource(Resource):
+    @condicional('Campus')
     @api.marshal_with(campus_model)
+    @cached('Campus')
     def get(self, id):
         """Get a campus by ID"""
         connection = get_db_connection()
@@ -197,6 +353,7 @@ class CampusResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Campus SET nome = %s WHERE id = %s", (nome, id))
                 connection.commit()
+                invalidar('Campus')
                 return {"message": "Campus successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating campus: {e}"}, 500
@@ -213,6 +370,7 @@ class CampusResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Campus WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Campus')
                 return {"message": "Campus successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting campus: {e}"}, 500
@@ -221,19 +379,27 @@ class CampusResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Curso list
+curso_colunas = {'id': 'id', 'name': 'name'}
+curso_filtros = {'name': 'name'}
+
 # Endpoint for Curso
 @api.route('/cursos')
 class CursoList(Resource):
-    @api.marshal_list_with(curso_model)
+    @condicional('Curso')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in curso_filtros}})
+    @api.response(200, 'Success', [curso_model])
+    @cached('Curso')
     def get(self):
         """List all courses"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                cursor.execute("SELECT * FROM Curso")
-                cursos = cursor.fetchall()
-                return cursos, 200
+                cursos, headers = listar(cursor, "Curso", curso_colunas, curso_filtros)
+                return marshal(cursos, curso_model, mask=request.args.get('fields')), 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving courses: {e}"}, 500
             finally:
@@ -255,6 +421,7 @@ class CursoList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Curso (name) VALUES (%s)", (name,))
                 connection.commit()
+                invalidar('Curso')
                 return {"message": "Course successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating course: {e}"}, 500
@@ -265,7 +432,9 @@ class CursoList(Resource):
 
 @api.route('/cursos/<int:id>')
 class CursoResource(Resource):
+    @condicional('Curso')
     @api.marshal_with(curso_model)
+    @cached('Curso')
     def get(self, id):
         """Get a course by ID"""
         connection = get_db_connection()
@@ -298,6 +467,7 @@ class CursoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Curso SET name = %s WHERE id = %s", (name, id))
                 connection.commit()
+                invalidar('Curso')
                 return {"message": "Course successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating course: {e}"}, 500
@@ -314,6 +484,7 @@ class CursoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Curso WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Curso')
                 return {"message": "Course successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting course: {e}"}, 500
@@ -322,19 +493,26 @@ class CursoResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Professores list
+professor_colunas = {'id': 'id', 'nome': 'nome', 'curriculo': 'curriculo', 'email': 'email'}
+professor_filtros = {'nome': 'nome', 'email': 'email'}
+
 # Endpoint for Professores
 @api.route('/professores')
 class ProfessoresList(Resource):
-    @api.marshal_list_with(professor_model)
+    @condicional('Professores')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in professor_filtros}})
+    @api.response(200, 'Success', [professor_model])
     def get(self):
         """List all professors"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                cursor.execute("SELECT * FROM Professores")
-                professores = cursor.fetchall()
-                return professores, 200
+                professores, headers = listar(cursor, "Professores", professor_colunas, professor_filtros)
+                return marshal(professores, professor_model, mask=request.args.get('fields')), 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving professors: {e}"}, 500
             finally:
@@ -358,6 +536,7 @@ class ProfessoresList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Professores (nome, curriculo, email) VALUES (%s, %s, %s)", (nome, curriculo, email))
                 connection.commit()
+                invalidar('Professores')
                 return {"message": "Professor successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating professor: {e}"}, 500
@@ -368,6 +547,7 @@ class ProfessoresList(Resource):
 
 @api.route('/professores/<int:id>')
 class ProfessorResource(Resource):
+    @condicional('Professores')
     @api.marshal_with(professor_model)
     def get(self, id):
         """Get a professor by ID"""
@@ -403,6 +583,7 @@ class ProfessorResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Professores SET nome = %s, curriculo = %s, email = %s WHERE id = %s", (nome, curriculo, email, id))
                 connection.commit()
+                invalidar('Professores')
                 return {"message": "Professor successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating professor: {e}"}, 500
@@ -419,6 +600,7 @@ class ProfessorResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Professores WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Professores')
                 return {"message": "Professor successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting professor: {e}"}, 500
@@ -427,19 +609,28 @@ class ProfessorResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Materia list
+materia_colunas = {'id': 'id', 'nome': 'nome', 'semestre': 'semestre', 'modalidade': 'modalidade',
+                   'curriculo': 'curriculo', 'area': 'area'}
+materia_filtros = {'nome': 'nome', 'semestre': 'semestre', 'modalidade': 'modalidade', 'area': 'area'}
+
 # Endpoint for Materia
 @api.route('/materias')
 class MateriaList(Resource):
-    @api.marshal_list_with(materia_model)
+    @condicional('Materia')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in materia_filtros}})
+    @api.response(200, 'Success', [materia_model])
+    @cached('Materia')
     def get(self):
         """List all subjects"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                cursor.execute("SELECT * FROM Materia")
-                materias = cursor.fetchall()
-                return materias, 200
+                materias, headers = listar(cursor, "Materia", materia_colunas, materia_filtros)
+                return marshal(materias, materia_model, mask=request.args.get('fields')), 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving subjects: {e}"}, 500
             finally:
@@ -467,6 +658,7 @@ class MateriaList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Materia (nome, semestre, modalidade, curriculo, area) VALUES (%s, %s, %s, %s, %s)", (nome, semestre, modalidade, curriculo, area))
                 connection.commit()
+                invalidar('Materia')
                 return {"message": "Subject successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating subject: {e}"}, 500
@@ -477,7 +669,9 @@ class MateriaList(Resource):
 
 @api.route('/materias/<int:id>')
 class MateriaResource(Resource):
+    @condicional('Materia')
     @api.marshal_with(materia_model)
+    @cached('Materia')
     def get(self, id):
         """Get a subject by ID"""
         connection = get_db_connection()
@@ -516,6 +710,7 @@ class MateriaResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Materia SET nome = %s, semestre = %s, modalidade = %s, curriculo = %s, area = %s WHERE id = %s", (nome, semestre, modalidade, curriculo, area, id))
                 connection.commit()
+                invalidar('Materia')
                 return {"message": "Subject successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating subject: {e}"}, 500
@@ -532,6 +727,7 @@ class MateriaResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Materia WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Materia')
                 return {"message": "Subject successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting subject: {e}"}, 500
@@ -540,24 +736,32 @@ class MateriaResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Materia_Curso list
+materia_curso_colunas = {'id': 'mc.id', 'materia_id': 'mc.materia_id', 'curso_id': 'mc.curso_id',
+                         'materia_nome': 'm.nome', 'curso_name': 'c.name'}
+materia_curso_origem = """
+    Materia_Curso mc
+    JOIN Materia m ON mc.materia_id = m.id
+    JOIN Curso c ON mc.curso_id = c.id
+"""
+materia_curso_filtros = {'materia_id': 'mc.materia_id', 'curso_id': 'mc.curso_id'}
+
 # Endpoint for Materia_Curso
 @api.route('/materia_cursos')
 class MateriaCursoList(Resource):
+    @condicional('Materia_Curso', 'Materia', 'Curso')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in materia_curso_filtros}})
     def get(self):
         """List all subject-course relations with full details"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                query = """
-                    SELECT mc.id, m.nome as materia_nome, c.name as curso_name
-                    FROM Materia_Curso mc
-                    JOIN Materia m ON mc.materia_id = m.id
-                    JOIN Curso c ON mc.curso_id = c.id
-                """
-                cursor.execute(query)
-                materia_cursos = cursor.fetchall()
-                return {"materia_cursos": materia_cursos}, 200
+                materia_cursos, headers = listar(cursor, materia_curso_origem, materia_curso_colunas, materia_curso_filtros,
+                                                 padrao=['id', 'materia_nome', 'curso_name'])
+                return {"materia_cursos": materia_cursos}, 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving Materia_Curso: {e}"}, 500
             finally:
@@ -580,6 +784,7 @@ class MateriaCursoList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Materia_Curso (materia_id, curso_id) VALUES (%s, %s)", (materia_id, curso_id))
                 connection.commit()
+                invalidar('Materia_Curso')
                 return {"message": "Relation successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating relation: {e}"}, 500
@@ -590,6 +795,7 @@ class MateriaCursoList(Resource):
 
 @api.route('/materia_cursos/<int:id>')
 class MateriaCursoResource(Resource):
+    @condicional('Materia_Curso', 'Materia', 'Curso')
     def get(self, id):
         """Get a subject-course relation by ID with full details"""
         connection = get_db_connection()
@@ -630,6 +836,7 @@ class MateriaCursoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Materia_Curso SET materia_id = %s, curso_id = %s WHERE id = %s", (materia_id, curso_id, id))
                 connection.commit()
+                invalidar('Materia_Curso')
                 return {"message": "Relation successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating relation: {e}"}, 500
@@ -646,6 +853,7 @@ class MateriaCursoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Materia_Curso WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Materia_Curso')
                 return {"message": "Relation successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting relation: {e}"}, 500
@@ -654,24 +862,32 @@ class MateriaCursoResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Professor_Materia list
+professor_materia_colunas = {'id': 'pm.id', 'professor_id': 'pm.professor_id', 'materia_id': 'pm.materia_id',
+                             'professor_nome': 'p.nome', 'materia_nome': 'm.nome'}
+professor_materia_origem = """
+    Professor_Materia pm
+    JOIN Professores p ON pm.professor_id = p.id
+    JOIN Materia m ON pm.materia_id = m.id
+"""
+professor_materia_filtros = {'professor_id': 'pm.professor_id', 'materia_id': 'pm.materia_id'}
+
 # Endpoint for Professor_Materia
 @api.route('/professor_materias')
 class ProfessorMateriaList(Resource):
+    @condicional('Professor_Materia', 'Professores', 'Materia')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in professor_materia_filtros}})
     def get(self):
         """List all professor-subject relations with full details"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                query = """
-                    SELECT pm.id, p.nome as professor_nome, m.nome as materia_nome
-                    FROM Professor_Materia pm
-                    JOIN Professores p ON pm.professor_id = p.id
-                    JOIN Materia m ON pm.materia_id = m.id
-                """
-                cursor.execute(query)
-                professor_materias = cursor.fetchall()
-                return {"professor_materias": professor_materias}, 200
+                professor_materias, headers = listar(cursor, professor_materia_origem, professor_materia_colunas, professor_materia_filtros,
+                                                     padrao=['id', 'professor_nome', 'materia_nome'])
+                return {"professor_materias": professor_materias}, 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving Professor_Materia: {e}"}, 500
             finally:
@@ -694,6 +910,7 @@ class ProfessorMateriaList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Professor_Materia (professor_id, materia_id) VALUES (%s, %s)", (professor_id, materia_id))
                 connection.commit()
+                invalidar('Professor_Materia')
                 return {"message": "Relation successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating relation: {e}"}, 500
@@ -704,6 +921,7 @@ class ProfessorMateriaList(Resource):
 
 @api.route('/professor_materias/<int:id>')
 class ProfessorMateriaResource(Resource):
+    @condicional('Professor_Materia', 'Professores', 'Materia')
     def get(self, id):
         """Get a professor-subject relation by ID with full details"""
         connection = get_db_connection()
@@ -744,6 +962,7 @@ class ProfessorMateriaResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Professor_Materia SET professor_id = %s, materia_id = %s WHERE id = %s", (professor_id, materia_id, id))
                 connection.commit()
+                invalidar('Professor_Materia')
                 return {"message": "Relation successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating relation: {e}"}, 500
@@ -760,6 +979,7 @@ class ProfessorMateriaResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Professor_Materia WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Professor_Materia')
                 return {"message": "Relation successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting relation: {e}"}, 500
@@ -768,19 +988,27 @@ class ProfessorMateriaResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Turno list
+turno_colunas = {'id': 'id', 'hturno': 'hturno'}
+turno_filtros = {'hturno': 'hturno'}
+
 # Endpoint for Turno
 @api.route('/turnos')
 class TurnoList(Resource):
-    @api.marshal_list_with(turno_model)
+    @condicional('Turno')
+    @api.doc(params={**list_params, **{f: f'Filter by {f}' for f in turno_filtros}})
+    @api.response(200, 'Success', [turno_model])
+    @cached('Turno')
     def get(self):
         """List all shifts"""
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                cursor.execute("SELECT * FROM Turno")
-                turnos = cursor.fetchall()
-                return turnos, 200
+                turnos, headers = listar(cursor, "Turno", turno_colunas, turno_filtros)
+                return marshal(turnos, turno_model, mask=request.args.get('fields')), 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving shifts: {e}"}, 500
             finally:
@@ -802,6 +1030,7 @@ class TurnoList(Resource):
                 cursor = connection.cursor()
                 cursor.execute("INSERT INTO Turno (hturno) VALUES (%s)", (hturno,))
                 connection.commit()
+                invalidar('Turno')
                 return {"message": "Shift successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating shift: {e}"}, 500
@@ -812,7 +1041,9 @@ class TurnoList(Resource):
 
 @api.route('/turnos/<int:id>')
 class TurnoResource(Resource):
+    @condicional('Turno')
     @api.marshal_with(turno_model)
+    @cached('Turno')
     def get(self, id):
         """Get a shift by ID"""
         connection = get_db_connection()
@@ -845,6 +1076,7 @@ class TurnoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("UPDATE Turno SET hturno = %s WHERE id = %s", (hturno, id))
                 connection.commit()
+                invalidar('Turno')
                 return {"message": "Shift successfully updated."}, 200
             except Exception as e:
                 return {"message": f"Error updating shift: {e}"}, 500
@@ -861,6 +1093,7 @@ class TurnoResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Turno WHERE id = %s", (id,))
                 connection.commit()
+                invalidar('Turno')
                 return {"message": "Shift successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting shift: {e}"}, 500
@@ -869,25 +1102,38 @@ class TurnoResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Columns and filters of the Disponibilidade list
+disponibilidade_colunas = {
+    'id': 'd.id', 'professor_id': 'd.professor_id', 'turno_id': 'd.turno_id', 'campus_id': 'd.campus_id',
+    'consideracoes': 'd.consideracoes',
+    **{coluna: f'd.{coluna}' for coluna in COLUNAS_DISPONIBILIDADE},
+    'professor_nome': 'p.nome', 'turno_hturno': 't.hturno', 'campus_nome': 'c.nome',
+}
+disponibilidade_origem = """
+    Disponibilidade d
+    JOIN Professores p ON d.professor_id = p.id
+    LEFT JOIN Turno t ON d.turno_id = t.id
+    JOIN Campus c ON d.campus_id = c.id
+"""
+disponibilidade_filtros = {'professor_id': 'd.professor_id', 'campus_id': 'd.campus_id', 'turno_id': 'd.turno_id'}
+
 # Endpoint for Disponibilidade
 @api.route('/disponibilidades')
 class DisponibilidadeList(Resource):
+    @condicional('Disponibilidade', 'Professores', 'Turno', 'Campus')
+    @api.doc(params={**list_params, 'stream': 'Stream every matching row as ndjson or a chunked json array (ignores limit/cursor)', **{f: f'Filter by {f}' for f in disponibilidade_filtros}})
     def get(self):
         """List all availabilities with full details"""
+        if request.args.get('stream'):
+            return transmitir(disponibilidade_origem, disponibilidade_colunas, disponibilidade_filtros)
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                query = """
-                    SELECT d.*, p.nome as professor_nome, t.hturno as turno_hturno, c.nome as campus_nome
-                    FROM Disponibilidade d
-                    JOIN Professores p ON d.professor_id = p.id
-                    LEFT JOIN Turno t ON d.turno_id = t.id
-                    JOIN Campus c ON d.campus_id = c.id
-                """
-                cursor.execute(query)
-                disponibilidades = cursor.fetchall()
-                return {"disponibilidades": disponibilidades}, 200
+                disponibilidades, headers = listar(cursor, disponibilidade_origem, disponibilidade_colunas, disponibilidade_filtros)
+                return {"disponibilidades": disponibilidades}, 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving Disponibilidade: {e}"}, 500
             finally:
@@ -922,6 +1168,7 @@ class DisponibilidadeList(Resource):
                 query = f"INSERT INTO Disponibilidade ({fields_str}) VALUES ({placeholders})"
                 cursor.execute(query, values)
                 connection.commit()
+                invalidar('Disponibilidade')
                 return {"message": "Availability successfully created."}, 201
             except Exception as e:
                 return {"message": f"Error creating availability: {e}"}, 500
@@ -989,24 +1236,11 @@ def verificar_compatibilidade_turma(turma_id):
         professor_ids = [p['professor_id'] for p in professores]
 
         # Step 4: Check availability of professors on the same campus and day/shift
-        coluna_dia_turno = f"{dia_da_semana.lower()}{turno.lower()}"  # Ex.: segmanha or segnoite
-
-        format_strings = ','.join(['%s'] * len(professor_ids))
-        query_disponibilidade = f"""
-            SELECT d.professor_id
-            FROM Disponibilidade d
-            WHERE d.campus_id = %s 
-              AND d.{coluna_dia_turno} = 1 
-              AND d.professor_id IN ({format_strings})
-        """
-        parametros_disponibilidade = [campus_id] + professor_ids
-        cursor.execute(query_disponibilidade, parametros_disponibilidade)
-        professores_disponiveis = cursor.fetchall()
-        if not professores_disponiveis:
+        indice = IndiceDisponibilidade.carregar(cursor, professor_ids=professor_ids, campus_id=campus_id)
+        professores_compativeis = indice.disponiveis(campus_id, dia_da_semana, turno, candidatos=professor_ids)
+        if not professores_compativeis:
             return {"message": "Nenhum professor disponível para a turma!"}, 404
 
-        professores_compativeis = [p['professor_id'] for p in professores_disponiveis]
-
         return {"professores_compatíveis": professores_compativeis}, 200
 
     except Exception as e:
@@ -1014,6 +1248,22 @@ def verificar_compatibilidade_turma(turma_id):
     finally:
         close_connection(connection)
 
+# Function to verify compatibility for every class in one pass
+def verificar_compatibilidade_turmas(semestre=None):
+    try:
+        # Load every table once (the four queries run concurrently, each on its own
+        # pooled connection) and resolve each class against the in-memory indexes
+        problema = ProblemaAlocacao.carregar_em_paralelo(get_connection, semestre)
+        resultado = [
+            {"turma_id": turma['id'], "professores_compatíveis": problema.candidatos(turma)}
+            for turma in problema.turmas
+        ]
+
+        return {"turmas": resultado}, 200
+
+    except Exception as e:
+        return {"message": f"Erro ao verificar compatibilidade: {repr(e)}"}, 500
+
 # ProfessoresCompatibilidade Model
 professores_compatibilidade_model = api.model('ProfessoresCompatibilidade', {
     'professores_compatíveis': fields.List(fields.Integer, description='Lista de IDs dos professores compatíveis')
@@ -1022,6 +1272,7 @@ professores_compatibilidade_model = api.model('ProfessoresCompatibilidade', {
 # Endpoint to check compatibility of professors with a class
 @api.route('/turmas/<int:turma_id>/professores_compativeis')
 class ProfessoresCompativeis(Resource):
+    @condicional('Turma', 'Materia_Curso', 'Professor_Materia', 'Disponibilidade')
     @api.doc(description="Verifica a compatibilidade de professores para uma turma com base na matéria e na disponibilidade.")
     @api.response(200, 'Professores encontrados', model=professores_compatibilidade_model)
     @api.response(404, 'Nenhum professor encontrado ou disponível')
@@ -1036,27 +1287,226 @@ class ProfessoresCompativeis(Resource):
         except Exception as e:
             return {"message": f"Erro ao processar a solicitação: {e}"}, 500
 
+# TurmasCompatibilidade Model
+turmas_compatibilidade_model = api.model('TurmasCompatibilidade', {
+    'turmas': fields.List(fields.Nested(api.model('TurmaCompatibilidade', {
+        'turma_id': fields.Integer(description='ID da turma'),
+        'professores_compatíveis': fields.List(fields.Integer, description='Lista de IDs dos professores compatíveis')
+    })))
+})
+
+# Endpoint to check compatibility of professors with every class at once
+@api.route('/turmas/professores_compativeis')
+class TurmasProfessoresCompativeis(Resource):
+    @api.doc(description="Verifica a compatibilidade de professores para todas as turmas em uma única consulta.",
+             params={'semestre': 'Filtra as turmas por semestre, ex.: 2024.1'})
+    @condicional('Turma', 'Materia_Curso', 'Professor_Materia', 'Disponibilidade')
+    @api.response(200, 'Compatibilidade calculada', model=turmas_compatibilidade_model)
+    @api.response(500, 'Erro interno ao processar a solicitação')
+    def get(self):
+        """
+        Retorna os professores compatíveis de cada turma (opcionalmente de um semestre).
+        """
+        try:
+            resultado, status = verificar_compatibilidade_turmas(request.args.get('semestre'))
+            return resultado, status
+        except Exception as e:
+            return {"message": f"Erro ao processar a solicitação: {e}"}, 500
+
+# Alocacao Model
+alocacao_model = api.model('Alocacao', {
+    'semestre': fields.String(description='Semestre a ser alocado, ex.: 2024.1 (todos se omitido)'),
+    'manter_existentes': fields.Boolean(default=True, description='Mantém os professores já atribuídos às turmas'),
+    'carga_maxima': fields.Integer(description='Número máximo de turmas por professor'),
+    'processos': fields.Integer(description='Processos usados no cálculo (padrão 1 = sem paralelismo; no máximo os núcleos da máquina)'),
+    'aplicar': fields.Boolean(default=True, description='Grava o resultado na tabela Turma')
+})
+
+# Endpoint to assign professors to every class automatically
+@api.route('/alocacao/resolver')
+class AlocacaoResolver(Resource):
+    @api.expect(alocacao_model)
+    @api.doc(description="Atribui professores às turmas sem conflito de dia/turno e grava o resultado em uma única transação.")
+    @api.response(200, 'Alocação calculada')
+    @api.response(400, "'processos' ou 'carga_maxima' inválido")
+    @api.response(500, 'Erro interno ao processar a solicitação')
+    def post(self):
+        """
+        Resolve a grade horária atribuindo professores compatíveis às turmas.
+        """
+        data = request.get_json(silent=True) or {}
+        try:
+            processos = numero_de_processos(data.get('processos'))
+            carga_maxima = carga_maxima_valida(data.get('carga_maxima'))
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        connection = get_db_connection()
+        if connection:
+            try:
+                resultado = alocar(
+                    connection,
+                    semestre=data.get('semestre'),
+                    manter_existentes=data.get('manter_existentes', True),
+                    carga_maxima=carga_maxima,
+                    aplicar=data.get('aplicar', True),
+                    processos=processos,
+                )
+                return resultado, 200
+            except Exception as e:
+                return {"message": f"Erro ao resolver alocação: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+# Sync Model
+sync_model = api.model('Sync', {
+    'planilhas': fields.List(fields.String(enum=list(planilhas)), description='Planilhas a sincronizar (todas se omitido)'),
+    'completo': fields.Boolean(default=False, description='Baixa a planilha inteira para detectar linhas alteradas')
+})
+
+# Endpoint to import new Google Sheets rows into the database
+@api.route('/sync')
+class Sync(Resource):
+    @api.expect(sync_model)
+    @api.response(200, 'Sincronização concluída')
+    @api.response(400, 'Planilha desconhecida')
+    def post(self):
+        """
+        Sincroniza as planilhas do Google Sheets enviando apenas linhas novas ou alteradas.
+        """
+        data = request.get_json(silent=True) or {}
+        nomes = data.get('planilhas') or list(planilhas)
+        desconhecidas = [nome for nome in nomes if nome not in planilhas]
+        if desconhecidas:
+            return {"message": f"Planilhas desconhecidas: {desconhecidas}"}, 400
+        try:
+            return {"sync": sincronizar_planilhas(nomes, data.get('completo', False))}, 200
+        except Exception as e:
+            return {"message": f"Erro ao sincronizar planilhas: {e}"}, 500
+
+def agendar(tipo, parametros):
+    """Creates a background job and answers 202 with where to follow it."""
+    try:
+        job_id = jobs.criar(tipo, parametros)
+    except Exception as e:
+        return {"message": f"Erro ao agendar tarefa: {e}"}, 500
+    return {"job_id": job_id, "status": "pendente", "url": f"/jobs/{job_id}"}, 202, {"Location": f"/jobs/{job_id}"}
+
+# Endpoint to run the Google Sheets import in the background
+@api.route('/jobs/import')
+class JobImport(Resource):
+    @api.expect(sync_model)
+    @api.response(202, 'Tarefa agendada; acompanhe em /jobs/<id>')
+    @api.response(400, 'Planilha desconhecida')
+    def post(self):
+        """
+        Agenda a sincronização das planilhas sem prender a requisição.
+        """
+        data = request.get_json(silent=True) or {}
+        nomes = data.get('planilhas') or list(planilhas)
+        desconhecidas = [nome for nome in nomes if nome not in planilhas]
+        if desconhecidas:
+            return {"message": f"Planilhas desconhecidas: {desconhecidas}"}, 400
+        return agendar('import', {"planilhas": nomes, "completo": data.get('completo', False)})
+
+# Endpoint to run the allocation solver in the background
+@api.route('/jobs/alocacao')
+class JobAlocacao(Resource):
+    @api.expect(alocacao_model)
+    @api.response(202, 'Tarefa agendada; acompanhe em /jobs/<id>')
+    @api.response(400, "'processos' ou 'carga_maxima' inválido")
+    def post(self):
+        """
+        Agenda a alocação automática de professores sem prender a requisição.
+        """
+        data = request.get_json(silent=True) or {}
+        try:
+            processos = numero_de_processos(data.get('processos'))
+            carga_maxima = carga_maxima_valida(data.get('carga_maxima'))
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return agendar('alocacao', {
+            "semestre": data.get('semestre'),
+            "manter_existentes": data.get('manter_existentes', True),
+            "carga_maxima": carga_maxima,
+            "aplicar": data.get('aplicar', True),
+            "processos": processos,
+        })
+
+# Endpoint to follow a background job
+@api.route('/jobs/<int:id>')
+class Job(Resource):
+    @api.response(200, 'Estado, progresso e resultado da tarefa')
+    @api.response(404, 'Tarefa não encontrada')
+    def get(self, id):
+        """
+        Retorna o estado, o progresso e (ao terminar) o resultado de uma tarefa.
+        """
+        try:
+            job = jobs.obter(id)
+        except Exception as e:
+            return {"message": f"Erro ao consultar tarefa: {e}"}, 500
+        if job is None:
+            return {"message": "Tarefa não encontrada."}, 404
+        return {"job": job}, 200
+
 # Existing endpoints for Campus, Curso, Professores, Materia, Materia_Curso, etc.
 
+# Columns and filters of the Turma list
+turma_colunas = {
+    'id': 't.id', 'semestre': 't.semestre', 'materia_curso_id': 't.materia_curso_id',
+    'professor_id': 't.professor_id', 'turno': 't.turno', 'dia_da_semana': 't.dia_da_semana',
+    'campus_id': 't.campus_id', 'materia_id': 'mc.materia_id',
+    'professor_nome': 'p.nome', 'campus_nome': 'c.nome',
+}
+turma_origem = """
+    Turma t
+    LEFT JOIN Materia_Curso mc ON t.materia_curso_id = mc.id
+    LEFT JOIN Professores p ON t.professor_id = p.id
+    JOIN Campus c ON t.campus_id = c.id
+"""
+turma_filtros = {
+    'semestre': 't.semestre', 'campus_id': 't.campus_id', 'professor_id': 't.professor_id',
+    'materia_curso_id': 't.materia_curso_id', 'turno': 't.turno', 'dia_da_semana': 't.dia_da_semana',
+}
+
+def conflito_turma(cursor, professor_id, semestre, dia_da_semana, turno, turma_id=None):
+    """Turma que já ocupa o professor no mesmo semestre/dia/turno (consulta O(1) em memória)."""
+    ocupacao.garantir_carregado(cursor)
+    if ocupacao.conflito(professor_id, semestre, dia_da_semana, turno, turma_id) is None:
+        return None
+    # The index is per process: another worker may have deleted or moved that class meanwhile
+    return ocupacao.confirmar(cursor, professor_id, semestre, dia_da_semana, turno, turma_id)
+
+def resposta_conflito(professor_id, conflitante):
+    return {"message": f"Professor {professor_id} already teaches class {conflitante} on this semester/day/shift.",
+            "turma_conflitante": conflitante}, 409
+
+def violou_unicidade(e):
+    # Outro processo gravou o mesmo horário antes: a restrição UNIQUE de Turma recusa
+    if isinstance(e, pymysql.err.IntegrityError) and e.args and e.args[0] == ER.DUP_ENTRY:
+        ocupacao.descartar()
+        return True
+    return False
+
 # Endpoint for Turma
 @api.route('/turmas')
 class TurmaList(Resource):
+    @condicional('Turma', 'Materia_Curso', 'Professores', 'Campus')
+    @api.doc(params={**list_params, 'stream': 'Stream every matching row as ndjson or a chunked json array (ignores limit/cursor)', **{f: f'Filter by {f}' for f in turma_filtros}})
     def get(self):
         """List all classes with full details"""
+        if request.args.get('stream'):
+            return transmitir(turma_origem, turma_colunas, turma_filtros)
         connection = get_db_connection()
         if connection:
             try:
                 cursor = connection.cursor()
-                query = """
-                    SELECT t.*, mc.materia_id, p.nome as professor_nome, c.nome as campus_nome
-                    FROM Turma t
-                    LEFT JOIN Materia_Curso mc ON t.materia_curso_id = mc.id
-                    LEFT JOIN Professores p ON t.professor_id = p.id
-                    JOIN Campus c ON t.campus_id = c.id
-                """
-                cursor.execute(query)
-                turmas = cursor.fetchall()
-                return {"turmas": turmas}, 200
+                turmas, headers = listar(cursor, turma_origem, turma_colunas, turma_filtros)
+                return {"turmas": turmas}, 200, headers
+            except ValueError as e:
+                return {"message": str(e)}, 400
             except Exception as e:
                 return {"message": f"Error retrieving classes: {e}"}, 500
             finally:
@@ -1084,21 +1534,138 @@ class TurmaList(Resource):
         if connection:
             try:
                 cursor = connection.cursor()
+                conflitante = conflito_turma(cursor, professor_id, semestre, dia_da_semana, turno)
+                if conflitante:
+                    return resposta_conflito(professor_id, conflitante)
                 cursor.execute("""
                     INSERT INTO Turma (semestre, materia_curso_id, professor_id, turno, dia_da_semana, campus_id, materia_id)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """, (semestre, materia_curso_id, professor_id, turno, dia_da_semana, campus_id, materia_id))
                 connection.commit()
+                ocupacao.registrar(cursor.lastrowid, professor_id, semestre, dia_da_semana, turno)
+                invalidar('Turma')
                 return {"message": "Class successfully created."}, 201
             except Exception as e:
+                if violou_unicidade(e):
+                    return {"message": f"Professor {professor_id} already teaches a class on this semester/day/shift."}, 409
                 return {"message": f"Error creating class: {e}"}, 500
             finally:
                 close_connection(connection)
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Maximum number of classes accepted by one bulk request
+MAX_BULK_SIZE = 5000
+
+# Bulk Turma Models
+turmas_bulk_model = api.model('TurmasBulk', {
+    'turmas': fields.List(fields.Nested(turma_model), required=True, description='Classes to create')
+})
+turma_patch_model = api.model('TurmaPatch', {
+    'id': fields.Integer(required=True, description='ID of the class to update'),
+    'semestre': fields.String(description='Semester of the class, e.g., 2024.1'),
+    'materia_curso_id': fields.Integer(description='ID of the subject-course relation'),
+    'professor_id': fields.Integer(description='ID of the professor (null to unassign)'),
+    'turno': fields.String(description='Shift of the class', enum=['tarde', 'noite', 'manha']),
+    'dia_da_semana': fields.String(description='Day of the week', enum=['seg', 'ter', 'quar', 'quinta', 'sex']),
+    'campus_id': fields.Integer(description='ID of the campus'),
+    'materia_id': fields.Integer(description='ID of the subject')
+})
+turmas_bulk_patch_model = api.model('TurmasBulkPatch', {
+    'turmas': fields.List(fields.Nested(turma_patch_model), required=True,
+                          description='Classes to update; only the fields sent are changed')
+})
+
+def itens_bulk():
+    data = request.get_json(silent=True) or {}
+    itens = data.get('turmas') if isinstance(data, dict) else None
+    if not isinstance(itens, list) or not itens:
+        raise ValueError("Field 'turmas' must be a non-empty list!")
+    if len(itens) > MAX_BULK_SIZE:
+        raise ValueError(f"At most {MAX_BULK_SIZE} classes per request!")
+    return itens
+
+def resposta_bulk(resultados, status):
+    erros = sum(1 for r in resultados if r['status'] == 'erro')
+    if erros == len(resultados):
+        status = 400
+    return {"total": len(resultados), "gravadas": len(resultados) - erros, "erros": erros,
+            "resultados": resultados}, status
+
+# Endpoint to create or update many classes in one transaction
+@api.route('/turmas/bulk')
+class TurmaBulk(Resource):
+    @api.expect(turmas_bulk_model)
+    @api.response(201, 'Classes created; see the per-item results.')
+    @api.response(400, 'No class could be created.')
+    @api.response(409, 'A professor was booked twice by another writer.')
+    def post(self):
+        """Create many classes at once"""
+        try:
+            itens = itens_bulk()
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        connection = get_db_connection()
+        if connection:
+            try:
+                return resposta_bulk(inserir_turmas(connection, itens), 201)
+            except Exception as e:
+                if violou_unicidade(e):
+                    return {"message": "A professor already teaches a class on the same semester/day/shift."}, 409
+                return {"message": f"Error creating classes: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+    @api.expect(turmas_bulk_patch_model)
+    @api.response(200, 'Classes updated; see the per-item results.')
+    @api.response(400, 'No class could be updated.')
+    @api.response(409, 'A professor was booked twice by another writer.')
+    def patch(self):
+        """Update many classes at once"""
+        try:
+            itens = itens_bulk()
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        connection = get_db_connection()
+        if connection:
+            try:
+                return resposta_bulk(atualizar_turmas(connection, itens), 200)
+            except Exception as e:
+                if violou_unicidade(e):
+                    return {"message": "A professor already teaches a class on the same semester/day/shift."}, 409
+                return {"message": f"Error updating classes: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+# Endpoint listing professors booked twice in the same semester/day/shift
+@api.route('/turmas/conflitos')
+class TurmaConflitos(Resource):
+    @api.doc(params={'recarregar': 'Rebuild the occupancy index from the Turma table first (1/true)'})
+    def get(self):
+        """List double-booked professors from the in-memory occupancy index"""
+        connection = get_db_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                if request.args.get('recarregar', '').lower() in ('1', 'true'):
+                    ocupacao.carregar(cursor)
+                else:
+                    ocupacao.garantir_carregado(cursor)
+                return {"conflitos": ocupacao.conflitos()}, 200
+            except Exception as e:
+                return {"message": f"Error checking conflicts: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
 @api.route('/turmas/<int:id>')
 class TurmaResource(Resource):
+    @condicional('Turma', 'Materia_Curso', 'Professores', 'Campus')
     def get(self, id):
         """Get a class by ID with full details"""
         connection = get_db_connection()
@@ -1145,13 +1712,21 @@ class TurmaResource(Resource):
         if connection:
             try:
                 cursor = connection.cursor()
+                conflitante = conflito_turma(cursor, professor_id, semestre, dia_da_semana, turno, turma_id=id)
+                if conflitante:
+                    return resposta_conflito(professor_id, conflitante)
                 cursor.execute("""
                     UPDATE Turma SET semestre = %s, materia_curso_id = %s, professor_id = %s, turno = %s, dia_da_semana = %s, campus_id = %s, materia_id = %s
                     WHERE id = %s
                 """, (semestre, materia_curso_id, professor_id, turno, dia_da_semana, campus_id, materia_id, id))
                 connection.commit()
+                if cursor.rowcount:
+                    ocupacao.registrar(id, professor_id, semestre, dia_da_semana, turno)
+                invalidar('Turma')
                 return {"message": "Class successfully updated."}, 200
             except Exception as e:
+                if violou_unicidade(e):
+                    return {"message": f"Professor {professor_id} already teaches a class on this semester/day/shift."}, 409
                 return {"message": f"Error updating class: {e}"}, 500
             finally:
                 close_connection(connection)
@@ -1166,6 +1741,8 @@ class TurmaResource(Resource):
                 cursor = connection.cursor()
                 cursor.execute("DELETE FROM Turma WHERE id = %s", (id,))
                 connection.commit()
+                ocupacao.remover(id)
+                invalidar('Turma')
                 return {"message": "Class successfully deleted."}, 200
             except Exception as e:
                 return {"message": f"Error deleting class: {e}"}, 500
@@ -1174,6 +1751,212 @@ class TurmaResource(Resource):
         else:
             return {"message": "Unable to connect to the database!"}, 500
 
+# Tables exposed by /dados (the dashboard snapshot)
+TABELAS_DADOS = ['Campus', 'Curso', 'Turno', 'Professores', 'Materia', 'Materia_Curso',
+                 'Professor_Materia', 'Disponibilidade', 'Professor_Disponibilidade', 'Turma']
+
+# Serialized snapshots keyed by the ETag of the tables they contain
+_snapshots = TTLCache(maxsize=32, ttl=cache_ttl)
+_snapshots_lock = threading.Lock()
+
+# Endpoint with every table in a single response, used by the dashboard
+@api.route('/dados')
+class Dados(Resource):
+    @api.doc(params={'tables': f"Comma-separated tables to include (default: all of {', '.join(TABELAS_DADOS)})"})
+    def get(self):
+        """Snapshot of all tables in a single response"""
+        tabelas = TABELAS_DADOS
+        if request.args.get('tables'):
+            tabelas = [t.strip() for t in request.args['tables'].split(',') if t.strip()]
+            invalidas = [t for t in tabelas if t not in TABELAS_DADOS]
+            if invalidas:
+                return {"message": f"Unknown tables: {', '.join(invalidas)}"}, 400
+
+        tag = etag(*tabelas)
+        if request.if_none_match.contains(tag):
+            return Response(status=304, headers={'ETag': f'"{tag}"'})
+        chave = (tuple(tabelas), tag)
+        with _snapshots_lock:
+            corpo = _snapshots.get(chave)
+        if corpo is None:
+            connection = get_db_connection()
+            if not connection:
+                return {"message": "Unable to connect to the database!"}, 500
+            try:
+                cursor = connection.cursor()
+                dados = {}
+                for tabela in tabelas:
+                    cursor.execute(f"SELECT * FROM {tabela}")
+                    dados[tabela] = cursor.fetchall()
+                corpo = json.dumps(dados, default=str)
+            except Exception as e:
+                return {"message": f"Error retrieving data: {e}"}, 500
+            finally:
+                close_connection(connection)
+            with _snapshots_lock:
+                _snapshots[chave] = corpo
+        return Response(corpo, mimetype='application/json', headers={'ETag': f'"{tag}"'})
+
+# Endpoint with the number of available professors per campus/day/shift
+@api.route('/agregados/disponibilidade')
+class AgregadoDisponibilidade(Resource):
+    @condicional('Disponibilidade')
+    @api.doc(params={'campus_id': 'Filter by campus_id'})
+    def get(self):
+        """Available professors per campus, day and shift (SQL GROUP BY)"""
+        contagens = ', '.join(
+            f"COUNT(DISTINCT CASE WHEN {coluna} THEN professor_id END) AS {coluna}"
+            for coluna in COLUNAS_DISPONIBILIDADE
+        )
+        query = f"SELECT campus_id, {contagens} FROM Disponibilidade"
+        parametros = []
+        if request.args.get('campus_id'):
+            query += " WHERE campus_id = %s"
+            parametros.append(request.args['campus_id'])
+        query += " GROUP BY campus_id ORDER BY campus_id"
+        connection = get_db_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(query, parametros)
+                resultado = [
+                    {"campus_id": row['campus_id'], "dia_da_semana": dia, "turno": turno,
+                     "professores": int(row[f"{dia}{turno}"])}
+                    for row in cursor.fetchall()
+                    for turno in TURNOS
+                    for dia in DIAS_DA_SEMANA
+                ]
+                return {"disponibilidade": resultado}, 200
+            except Exception as e:
+                return {"message": f"Error aggregating Disponibilidade: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+# Endpoint with the number of classes per semester/campus
+@api.route('/agregados/turmas')
+class AgregadoTurmas(Resource):
+    @condicional('Turma')
+    @api.doc(params={'semestre': 'Filter by semestre', 'campus_id': 'Filter by campus_id'})
+    def get(self):
+        """Classes per semester and campus (SQL GROUP BY)"""
+        condicoes, parametros = filtros_agregado(('semestre', 'campus_id'))
+        query = f"""
+            SELECT semestre, campus_id, COUNT(*) AS turmas, COUNT(professor_id) AS com_professor
+            FROM Turma {condicoes}
+            GROUP BY semestre, campus_id
+            ORDER BY semestre, campus_id
+        """
+        connection = get_db_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(query, parametros)
+                return {"turmas": cursor.fetchall()}, 200
+            except Exception as e:
+                return {"message": f"Error aggregating classes: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+# Endpoint with each professor's number of classes per slot
+@api.route('/agregados/carga')
+class AgregadoCarga(Resource):
+    @condicional('Turma')
+    @api.doc(params={'semestre': 'Filter by semestre', 'campus_id': 'Filter by campus_id',
+                     'professor_id': 'Filter by professor_id'})
+    def get(self):
+        """Professor load per semester, day and shift (SQL GROUP BY)"""
+        condicoes, parametros = filtros_agregado(('semestre', 'campus_id', 'professor_id'))
+        condicoes = (condicoes + " AND" if condicoes else "WHERE") + " professor_id IS NOT NULL"
+        query = f"""
+            SELECT professor_id, semestre, dia_da_semana, turno, COUNT(*) AS turmas
+            FROM Turma {condicoes}
+            GROUP BY professor_id, semestre, dia_da_semana, turno
+            ORDER BY professor_id, semestre, dia_da_semana, turno
+        """
+        connection = get_db_connection()
+        if connection:
+            try:
+                cursor = connection.cursor()
+                cursor.execute(query, parametros)
+                return {"carga": cursor.fetchall()}, 200
+            except Exception as e:
+                return {"message": f"Error aggregating professor load: {e}"}, 500
+            finally:
+                close_connection(connection)
+        else:
+            return {"message": "Unable to connect to the database!"}, 500
+
+# Endpoint to export a whole table in a columnar format, streamed from the cursor
+@api.route('/export/<string:tabela>')
+class Export(Resource):
+    @api.doc(params={'format': f"One of {', '.join(exportacao.formatos)} (default csv)"})
+    def get(self, tabela):
+        """Export a table as CSV, Arrow IPC stream or Parquet"""
+        if tabela not in TABELAS_DADOS:
+            return {"message": f"Unknown table: {tabela}"}, 404
+        formato = request.args.get('format', 'csv')
+        if formato not in exportacao.formatos:
+            return {"message": f"The parameter 'format' must be one of {', '.join(exportacao.formatos)}."}, 400
+        if formato != 'csv' and not exportacao.pyarrow_disponivel():
+            return {"message": f"The format '{formato}' requires pyarrow."}, 501
+
+        tag = etag(tabela)
+        if request.if_none_match.contains(tag):
+            return Response(status=304, headers={'ETag': f'"{tag}"'})
+
+        connection = get_db_connection()
+        if not connection:
+            return {"message": "Unable to connect to the database!"}, 500
+
+        def gerar():
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(f"SELECT * FROM {tabela}")
+                yield from exportacao.gerar(cursor, formato, STREAM_CHUNK_SIZE)
+            finally:
+                cursor.close()
+                close_connection(connection)
+
+        headers = {
+            'ETag': f'"{tag}"',
+            'Content-Disposition': f'attachment; filename="{tabela}.{formato}"',
+        }
+        response = Response(gerar(), mimetype=exportacao.formatos[formato], headers=headers)
+        # Same as transmitir(): a HEAD never starts gerar(), so release the connection on close
+        response.call_on_close(lambda: close_connection(connection))
+        return response
+
+# Endpoint for reference table cache metrics
+@api.route('/cache')
+class CacheStatus(Resource):
+    def get(self):
+        """Hit/miss counters and size of the reference table cache"""
+        return estatisticas(), 200
+
+    def delete(self):
+        """Clear the reference table cache"""
+        invalidar()
+        return {"message": "Cache successfully cleared."}, 200
+
+# Endpoint for connection pool metrics
+@api.route('/pool')
+class PoolStatus(Resource):
+    def get(self):
+        """Connection pool size and usage metrics"""
+        return get_pool_stats(), 200
+
+# Endpoint for Prometheus scraping
+@api.route('/metrics')
+class Metrics(Resource):
+    def get(self):
+        """Request, query and connection pool metrics in the Prometheus text format"""
+        return Response(metricas.exportar(get_pool_stats()), mimetype='text/plain; version=0.0.4')
+
 
 if __name__ == "__main__":
+    configuracoes.instalar_sighup()
     app.run(debug=True)
@@ -0,0 +1,237 @@
+# Métricas de desempenho no formato de texto do Prometheus (sem dependências extras):
+# duração de cada requisição, de cada consulta SQL e da espera por uma conexão do pool.
+# Cada resposta leva um cabeçalho Server-Timing separando o tempo de banco do resto,
+# e consultas acima de slow_query_threshold vão para o log 'pi2.sql'.
+
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+from pymysql.cursors import SSCursor
+
+slow_query_threshold = 0.5  # segundos
+buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+logger = logging.getLogger('pi2.sql')
+
+_lock = threading.Lock()
+
+
+def _rotulos(nomes, valores):
+    if not nomes:
+        return ''
+    pares = []
+    for nome, valor in zip(nomes, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+class Contador:
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._valores = {}
+
+    def incrementar(self, valor=1, *rotulos):
+        with _lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with _lock:
+            for rotulos, valor in sorted(self._valores.items()):
+                linhas.append(f"{self.nome}{_rotulos(self.rotulos, rotulos)} {valor}")
+        return linhas
+
+
+class Histograma:
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._series = {}  # rótulos -> [contagem por bucket, soma, total]
+
+    def observar(self, valor, *rotulos):
+        with _lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * len(buckets), 0.0, 0]
+            for i, limite in enumerate(buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with _lock:
+            for rotulos, (contagens, soma, total) in sorted(self._series.items()):
+                for limite, contagem in zip(buckets, contagens):
+                    linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), rotulos + (limite,))} {contagem}")
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), rotulos + ('+Inf',))} {total}")
+                linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, rotulos)} {soma}")
+                linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, rotulos)} {total}")
+        return linhas
+
+
+requisicoes = Contador('pi2_http_requests_total', 'Requisições atendidas.', ('method', 'endpoint', 'status'))
+duracao_requisicoes = Histograma('pi2_http_request_duration_seconds', 'Duração das requisições.',
+                                 ('method', 'endpoint'))
+duracao_consultas = Histograma('pi2_db_query_duration_seconds', 'Duração das consultas SQL.', ('operacao',))
+linhas_consultas = Contador('pi2_db_query_rows_total', 'Linhas lidas ou alteradas pelas consultas SQL.',
+                            ('operacao',))
+consultas_lentas = Contador('pi2_db_slow_queries_total', 'Consultas acima de slow_query_threshold.',
+                            ('operacao',))
+espera_conexao = Histograma('pi2_db_connection_acquire_seconds', 'Tempo para obter uma conexão do pool.')
+
+_metricas = [requisicoes, duracao_requisicoes, duracao_consultas, linhas_consultas, consultas_lentas, espera_conexao]
+
+# Contadores acumulados do pool (db.ConnectionPool.stats); os demais valores são instantâneos
+_contadores_pool = {'checkouts', 'timeouts', 'created', 'closed', 'health_check_failures'}
+
+
+def _tempos_da_requisicao():
+    if has_request_context():
+        return g.setdefault('tempos_db', {'consultas': 0, 'db': 0.0, 'conexao': 0.0})
+    return None
+
+
+def registrar_conexao(duracao):
+    espera_conexao.observar(duracao)
+    tempos = _tempos_da_requisicao()
+    if tempos is not None:
+        tempos['conexao'] += duracao
+
+
+def _operacao(query):
+    return query.split(None, 1)[0].upper() if query.strip() else 'VAZIA'
+
+
+def registrar_consulta(query, duracao, linhas):
+    operacao = _operacao(query)
+    duracao_consultas.observar(duracao, operacao)
+    if linhas and linhas > 0:
+        linhas_consultas.incrementar(linhas, operacao)
+    if duracao >= slow_query_threshold:
+        consultas_lentas.incrementar(1, operacao)
+        logger.warning("Consulta lenta (%.3fs, %s linhas): %s", duracao, linhas, ' '.join(query.split())[:500])
+    tempos = _tempos_da_requisicao()
+    if tempos is not None:
+        tempos['consultas'] += 1
+        tempos['db'] += duracao
+
+
+class CursorMedido:
+    """Envolve um cursor do pymysql medindo execute() e executemany()."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        # Em cursores sem buffer (SSCursor) o rowcount do execute() não é o número de
+        # linhas (vale 2**64 - 1); elas são contadas à medida que são lidas
+        self._sem_buffer = isinstance(cursor, SSCursor)
+        self._ultima_operacao = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        if not self._sem_buffer:
+            return iter(self._cursor)
+        return self._iterar()
+
+    def _iterar(self):
+        for row in self._cursor:
+            self._contar(1)
+            yield row
+
+    def _contar(self, linhas):
+        if linhas and self._ultima_operacao:
+            linhas_consultas.incrementar(linhas, self._ultima_operacao)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if self._sem_buffer and row is not None:
+            self._contar(1)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        if self._sem_buffer:
+            self._contar(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._sem_buffer:
+            self._contar(len(rows))
+        return rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _medir(self, metodo, query, args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(query, args)
+        finally:
+            self._ultima_operacao = _operacao(query)
+            linhas = None if self._sem_buffer else getattr(self._cursor, 'rowcount', None)
+            registrar_consulta(query, time.perf_counter() - inicio, linhas)
+
+    def execute(self, query, args=None):
+        return self._medir(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._medir(self._cursor.executemany, query, args)
+
+
+def instrumentar(app):
+    """Mede cada requisição do `app` e adiciona o cabeçalho Server-Timing às respostas."""
+
+    @app.before_request
+    def _iniciar():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _finalizar(response):
+        inicio = g.pop('inicio_requisicao', None)
+        if inicio is None:
+            return response
+        duracao = time.perf_counter() - inicio
+        endpoint = request.url_rule.rule if request.url_rule else 'desconhecido'
+        requisicoes.incrementar(1, request.method, endpoint, response.status_code)
+        duracao_requisicoes.observar(duracao, request.method, endpoint)
+
+        tempos = _tempos_da_requisicao()
+        # Respostas em stream continuam consultando o banco depois daqui; o cabeçalho
+        # cobre só o trabalho feito até a resposta começar a ser enviada
+        response.headers.add('Server-Timing', ', '.join([
+            f'conn;dur={tempos["conexao"] * 1000:.2f};desc="Espera pelo pool"',
+            f'db;dur={tempos["db"] * 1000:.2f};desc="{tempos["consultas"]} consultas"',
+            f'app;dur={max(duracao - tempos["db"] - tempos["conexao"], 0) * 1000:.2f}',
+            f'total;dur={duracao * 1000:.2f}',
+        ]))
+        return response
+
+
+def exportar(pool_stats=None):
+    """Texto no formato de exposição do Prometheus com todas as métricas."""
+    linhas = []
+    for metrica in _metricas:
+        linhas.extend(metrica.exportar())
+    for nome, valor in sorted((pool_stats or {}).items()):
+        if nome == 'wait_time':
+            linhas += ["# TYPE pi2_db_pool_wait_seconds_total counter", f"pi2_db_pool_wait_seconds_total {valor}"]
+        elif nome in _contadores_pool:
+            linhas += [f"# TYPE pi2_db_pool_{nome}_total counter", f"pi2_db_pool_{nome}_total {valor}"]
+        else:
+            linhas += [f"# TYPE pi2_db_pool_{nome} gauge", f"pi2_db_pool_{nome} {valor}"]
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,6 @@
+-- Um professor não pode ter duas turmas no mesmo semestre/dia/turno.
+-- Turmas sem professor (professor_id NULL) não entram na restrição.
+-- Antes de aplicar, resolva os conflitos existentes (GET /turmas/conflitos?recarregar=1).
+ALTER TABLE Turma
+    ADD CONSTRAINT uq_turma_professor_horario
+    UNIQUE (professor_id, semestre, dia_da_semana, turno);
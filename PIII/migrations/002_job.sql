@@ -0,0 +1,18 @@
+-- Tarefas em segundo plano (jobs.py): importações das planilhas e alocação automática.
+-- parametros e resultado guardam JSON em texto (compatível com MySQL e MariaDB).
+CREATE TABLE Job (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(32) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    parametros TEXT,
+    progresso INT NOT NULL DEFAULT 0,
+    total INT,
+    mensagem VARCHAR(255),
+    resultado MEDIUMTEXT,
+    erro TEXT,
+    criado_em DATETIME NOT NULL,
+    iniciado_em DATETIME,
+    atualizado_em DATETIME NOT NULL,
+    finalizado_em DATETIME,
+    INDEX idx_job_status (status)
+);
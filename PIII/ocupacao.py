@@ -0,0 +1,133 @@
+# Índice em memória de ocupação dos professores:
+# (professor_id, semestre, horário) -> turmas que ocupam esse horário.
+# As escritas em Turma consultam e atualizam o índice em O(1); a restrição
+# UNIQUE em Turma (migrations/001_turma_professor_horario.sql) garante o mesmo
+# entre processos diferentes.
+#
+# Cada processo tem o próprio índice e não vê as escritas dos outros: um conflito
+# achado nele é confirmado no banco (confirmar()) antes de recusar a escrita.
+
+import threading
+
+from disponibilidade import coluna_dia_turno
+
+
+def chave(professor_id, semestre, dia_da_semana, turno):
+    return (professor_id, semestre, coluna_dia_turno(dia_da_semana, turno))
+
+
+def grafias_dia(dia_da_semana):
+    """Valores de Turma.dia_da_semana que caem na mesma chave (a enum usa 'quinta', as colunas 'quin')."""
+    dia = dia_da_semana.lower()
+    return ('quinta', 'quin') if dia in ('quinta', 'quin') else (dia,)
+
+
+class OcupacaoProfessores:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._carregado = False
+        self._turmas = {}      # chave -> set(turma_id)
+        self._por_turma = {}   # turma_id -> chave
+        self._conflitos = set()  # chaves com mais de uma turma
+
+    def carregar(self, cursor):
+        cursor.execute("""
+            SELECT id, professor_id, semestre, dia_da_semana, turno
+            FROM Turma
+            WHERE professor_id IS NOT NULL
+        """)
+        rows = cursor.fetchall()
+        with self._lock:
+            self._turmas = {}
+            self._por_turma = {}
+            self._conflitos = set()
+            for row in rows:
+                if row['dia_da_semana'] and row['turno']:
+                    self._adicionar(row['id'], chave(row['professor_id'], row['semestre'],
+                                                     row['dia_da_semana'], row['turno']))
+            self._carregado = True
+
+    def garantir_carregado(self, cursor):
+        if not self._carregado:
+            self.carregar(cursor)
+
+    def descartar(self):
+        """Força uma nova carga na próxima consulta (após escritas em lote)."""
+        with self._lock:
+            self._carregado = False
+
+    def ocupantes(self, professor_id, semestre, dia_da_semana, turno):
+        """Turmas que ocupam o professor nesse horário."""
+        with self._lock:
+            return set(self._turmas.get(chave(professor_id, semestre, dia_da_semana, turno), ()))
+
+    def conflito(self, professor_id, semestre, dia_da_semana, turno, turma_id=None):
+        """Outra turma que já ocupa o professor nesse horário, ou None."""
+        if not professor_id:
+            return None
+        outras = self.ocupantes(professor_id, semestre, dia_da_semana, turno) - {turma_id}
+        return min(outras) if outras else None
+
+    def confirmar(self, cursor, professor_id, semestre, dia_da_semana, turno, turma_id=None):
+        """
+        Confere no banco (pelo índice UNIQUE de Turma) quem ocupa o horário e
+        corrige a entrada do índice se outro processo apagou ou moveu a turma.
+        """
+        # Compara pelas grafias normalizadas, como chave(): com o valor cru ('Quin', 'QUINTA')
+        # a consulta não acharia a turma gravada e o laço abaixo tiraria do índice um ocupante real
+        dias = grafias_dia(dia_da_semana)
+        cursor.execute(f"""
+            SELECT id FROM Turma
+            WHERE professor_id = %s AND semestre = %s AND dia_da_semana IN ({', '.join(['%s'] * len(dias))})
+              AND turno = %s AND id <> %s
+        """, (professor_id, semestre, *dias, turno.lower(), turma_id or 0))
+        atuais = {row['id'] for row in cursor.fetchall()}
+        k = chave(professor_id, semestre, dia_da_semana, turno)
+        with self._lock:
+            for antiga in self._turmas.get(k, set()) - atuais - {turma_id}:
+                self._remover(antiga)
+            for atual in atuais:
+                if self._por_turma.get(atual) != k:
+                    self._remover(atual)
+                    self._adicionar(atual, k)
+        return min(atuais) if atuais else None
+
+    def registrar(self, turma_id, professor_id, semestre, dia_da_semana, turno):
+        with self._lock:
+            self._remover(turma_id)
+            if professor_id:
+                self._adicionar(turma_id, chave(professor_id, semestre, dia_da_semana, turno))
+
+    def remover(self, turma_id):
+        with self._lock:
+            self._remover(turma_id)
+
+    def conflitos(self):
+        with self._lock:
+            return [
+                {"professor_id": professor_id, "semestre": semestre, "horario": horario,
+                 "turmas": sorted(self._turmas[(professor_id, semestre, horario)])}
+                for professor_id, semestre, horario in sorted(self._conflitos, key=str)
+            ]
+
+    def _adicionar(self, turma_id, k):
+        turmas = self._turmas.setdefault(k, set())
+        turmas.add(turma_id)
+        self._por_turma[turma_id] = k
+        if len(turmas) > 1:
+            self._conflitos.add(k)
+
+    def _remover(self, turma_id):
+        k = self._por_turma.pop(turma_id, None)
+        if k is None:
+            return
+        turmas = self._turmas[k]
+        turmas.discard(turma_id)
+        if len(turmas) < 2:
+            self._conflitos.discard(k)
+        if not turmas:
+            del self._turmas[k]
+
+
+ocupacao = OcupacaoProfessores()
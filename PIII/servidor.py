@@ -0,0 +1,111 @@
+# Servidor de produção da API (gunicorn), no lugar do app.run(debug=True) de main.py.
+#
+# O app é importado uma vez no processo mestre (preload): modelos do flask-restx e
+# configurações são carregados antes do fork, então todos os workers usam os mesmos
+# valores. Cada worker, logo após o fork, descarta o que herdou do mestre e não pode
+# ser compartilhado (pool de conexões, caches, serviços do Google, índice de ocupação)
+# e, ao sair, fecha as próprias conexões. Com SIGTERM o mestre para de aceitar
+# conexões e espera até graceful_timeout as requisições em andamento; com SIGHUP o
+# mestre relê as configurações (on_reload) e só então troca os workers.
+#
+# Cada worker tem o próprio pool (db.pool_size conexões): workers x pool_size
+# precisa caber no max_connections do MySQL.
+#
+# Uso:
+#     python servidor.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+import argparse
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn só roda em Unix; no Windows use main.py ou asgi.py
+    BaseApplication = None
+
+workers = 4
+threads = 4
+bind = '0.0.0.0:5000'
+timeout = 120           # segundos até um worker travado ser reiniciado
+graceful_timeout = 30   # segundos para terminar as requisições em andamento ao desligar
+max_requests = 0        # reinicia cada worker após N requisições (0 = nunca)
+
+
+def on_reload(server):
+    # Roda no mestre antes de criar os novos workers, que herdam os valores relidos
+    from configuracoes import configuracoes
+
+    configuracoes.recarregar()
+
+
+def post_fork(server, worker):
+    # As configurações herdadas do mestre são mantidas: só o que não pode ser compartilhado
+    import cache
+    import db
+    import googlecloud
+    from ocupacao import ocupacao
+
+    db.reset_pool()
+    cache.reiniciar_processo()
+    googlecloud.reset_services()
+    ocupacao.descartar()
+
+
+def worker_exit(server, worker):
+    import db
+
+    if db._pool is not None:
+        db.get_pool().close_all()
+
+
+def criar_aplicacao(opcoes):
+    if BaseApplication is None:
+        raise SystemExit("gunicorn não está instalado (pip install gunicorn).")
+
+    class ServidorAPI(BaseApplication):
+
+        def load_config(self):
+            for chave, valor in opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            from configuracoes import configuracoes
+            from main import app
+
+            # Lê todas as seções no mestre; as que faltarem ficam para a primeira consulta
+            for nome in configuracoes.secoes:
+                try:
+                    configuracoes.secao(nome)
+                except FileNotFoundError:
+                    pass
+            return app
+
+    return ServidorAPI()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de produção da API.")
+    parser.add_argument('--workers', type=int, default=workers, help="Processos")
+    parser.add_argument('--threads', type=int, default=threads, help="Threads por processo")
+    parser.add_argument('--bind', default=bind, help="Endereço:porta")
+    parser.add_argument('--timeout', type=int, default=timeout)
+    parser.add_argument('--graceful-timeout', type=int, default=graceful_timeout)
+    parser.add_argument('--max-requests', type=int, default=max_requests)
+    args = parser.parse_args()
+
+    criar_aplicacao({
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'on_reload': on_reload,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# Sincronização incremental das planilhas do Google Sheets com o MySQL.
+#
+# Para cada planilha guardamos (em sync_state.json) o hash do conteúdo de cada
+# linha já importada. Numa sincronização incremental só as linhas depois da
+# última sincronizada são baixadas; numa completa a planilha inteira é baixada,
+# mas apenas as linhas novas ou alteradas seguem para o db.py. Linhas novas são
+# inseridas; linhas alteradas atualizam no lugar o professor de chave (nome, email)
+# que a linha tinha na importação anterior (também guardada no estado).
+#
+# O estado é um arquivo compartilhado pelos workers (servidor.py) e pelas tarefas
+# (jobs.py), então cada sincronização segura um lock nomeado do MySQL (GET_LOCK):
+# dois processos nunca leem o mesmo estado e importam as mesmas linhas duas vezes.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from googlecloud import batch_get_sheet_data, load_config, load_config_new
+from db import (get_connection, insert_data_to_mysql, insert_disponibilidades_to_mysql, update_data_in_mysql,
+                update_disponibilidades_in_mysql)
+
+state_file = 'sync_state.json'
+lock_name = 'pi2_sync'  # lock nomeado do MySQL que serializa as sincronizações entre processos
+lock_timeout = 300      # segundos esperando outra sincronização terminar
+
+# Colunas padrão de cada formulário (podem ser sobrescritas por "columns" no config)
+colunas_professores = ['carimbo', 'nome', 'email', 'curriculo', 'materia3', 'materia4', 'materia5']
+colunas_disponibilidades = [
+    'carimbo', 'nome', 'email', 'campus',
+    'diasdemanha', 'diasdetarde', 'diasdenoite', 'observacao1',
+    'diasdemanha2', 'diasdetarde2', 'diasdenoite3', 'observacao2',
+]
+
+# planilha -> (carregar config, colunas padrão, inserir linhas novas, atualizar linhas alteradas)
+planilhas = {
+    'professores': (load_config, colunas_professores, insert_data_to_mysql, update_data_in_mysql),
+    'disponibilidades': (load_config_new, colunas_disponibilidades, insert_disponibilidades_to_mysql,
+                         update_disponibilidades_in_mysql),
+}
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def trava_sincronizacao():
+    """Exclusão mútua entre threads (_lock) e entre processos (GET_LOCK na mesma conexão)."""
+    with _lock:
+        connection = get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, %s) AS obtido", (lock_name, lock_timeout))
+                if not cursor.fetchone()['obtido']:
+                    raise TimeoutError(f"Outra sincronização ainda está em andamento após {lock_timeout}s")
+            try:
+                yield
+            finally:
+                # Se a conexão cair antes, o MySQL libera o lock ao encerrar a sessão
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+        finally:
+            connection.close()
+
+
+def load_state():
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp = state_file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, state_file)
+
+
+def hash_row(row):
+    return hashlib.sha1(json.dumps(row, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def range_a_partir_de(range_name, deslocamento):
+    """Desloca o início de um intervalo como 'Aba!A2:G' em `deslocamento` linhas."""
+    match = re.fullmatch(r"(?:(.+)!)?([A-Z]+)(\d+):([A-Z]+)\d*", range_name)
+    if not match:
+        raise ValueError(f"Intervalo não suportado para sincronização incremental: {range_name}")
+    aba, coluna_inicio, linha_inicio, coluna_fim = match.groups()
+    novo = f"{coluna_inicio}{int(linha_inicio) + deslocamento}:{coluna_fim}"
+    return f"{aba}!{novo}" if aba else novo
+
+
+def to_dict(row, colunas):
+    # A API omite as células vazias no fim da linha
+    return {coluna: (row[i] if i < len(row) else '') for i, coluna in enumerate(colunas)}
+
+
+def chave_professor(dados):
+    # Mesma chave usada pelo db.py para achar o professor de uma linha
+    return [dados.get('nome', 'N/A'), dados.get('email', 'N/A')]
+
+
+def falhou(resultado):
+    return bool(resultado.get("erro")) or any(e["linha"] is None for e in resultado.get("erros", []))
+
+
+def _importar(planilha, state, colunas, linhas, inicio):
+    """Envia ao banco as linhas novas/alteradas de `linhas` (a partir da posição `inicio`) e avança o estado."""
+    _, _, inserir, atualizar = planilhas[planilha]
+    hashes = state.get(planilha, {}).get('hashes', [])
+    chaves = state.get(planilha, {}).get('chaves')
+    if chaves is None or len(chaves) != len(hashes):
+        chaves = [None] * len(hashes)  # estado gravado antes de as chaves existirem
+
+    novos_hashes = list(hashes[:inicio])
+    novas_chaves = list(chaves[:inicio])
+    novas = []
+    alteradas = []  # (chave anterior, linha)
+    for posicao, row in enumerate(linhas, start=inicio):
+        h = hash_row(row)
+        dados = to_dict(row, colunas)
+        novos_hashes.append(h)
+        novas_chaves.append(chave_professor(dados))
+        if posicao >= len(hashes):
+            novas.append(dados)
+        elif hashes[posicao] != h:
+            alteradas.append((chaves[posicao], dados))
+
+    resumo = {"planilha": planilha, "linhas_lidas": len(linhas), "linhas_enviadas": len(novas) + len(alteradas),
+              "linhas_alteradas": len(alteradas)}
+    # Falha no lote: não avança o estado para tentar de novo na próxima vez
+    if alteradas:
+        resumo["resultado_alteradas"] = atualizar(alteradas)
+        if falhou(resumo["resultado_alteradas"]):
+            return resumo
+    if novas:
+        resumo["resultado"] = inserir(novas)
+        if falhou(resumo["resultado"]):
+            return resumo
+
+    state[planilha] = {"linhas": len(novos_hashes), "hashes": novos_hashes, "chaves": novas_chaves}
+    save_state(state)
+    return resumo
+
+
+def sincronizar_planilhas(nomes, completo=False, progresso=None):
+    """
+    Envia ao banco apenas as linhas novas (ou alteradas, se `completo`) de cada planilha.
+
+    Os intervalos de todas as planilhas são baixados juntos, em um único values().batchGet
+    por spreadsheet_id. Linhas alteradas atualizam o professor já importado em vez de criar outro.
+    `progresso(feitos, total, mensagem)`, se informado, é chamado antes de cada planilha.
+    """
+    with trava_sincronizacao():
+        state = load_state()
+        configs = {}
+        consultas = {}
+        inicios = {}
+        for nome in nomes:
+            config = configs[nome] = planilhas[nome][0]()
+            inicios[nome] = 0 if completo else len(state.get(nome, {}).get('hashes', []))
+            range_name = config['range_name'] if completo else range_a_partir_de(config['range_name'], inicios[nome])
+            consultas[nome] = dict(config, range_name=range_name)
+
+        if progresso:
+            progresso(0, len(nomes), "Baixando planilhas")
+        linhas = batch_get_sheet_data(consultas)
+
+        resumos = []
+        for feitas, nome in enumerate(nomes):
+            if progresso:
+                progresso(feitas, len(nomes), f"Sincronizando {nome}")
+            colunas = configs[nome].get('columns', planilhas[nome][1])
+            resumos.append(_importar(nome, state, colunas, linhas.get(nome, []), inicios[nome]))
+        if progresso:
+            progresso(len(nomes), len(nomes), "Sincronização concluída")
+        return resumos
+
+
+def sincronizar(planilha, completo=False):
+    return sincronizar_planilhas([planilha], completo)[0]
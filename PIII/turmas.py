@@ -0,0 +1,255 @@
+# Criação e atualização de turmas em lote.
+# Cada item é validado em memória (ids de Materia_Curso e Campus em cache, índice
+# de ocupação dos professores) e os itens válidos são gravados em uma única transação.
+# O resultado tem uma entrada por item, na ordem recebida.
+
+import cache
+from db import batch_size, chunks, verificar_ids_consecutivos
+from disponibilidade import BIT_POR_COLUNA, TURNOS, coluna_dia_turno
+from ocupacao import ocupacao
+
+campos_turma = ['semestre', 'materia_curso_id', 'professor_id', 'turno', 'dia_da_semana', 'campus_id', 'materia_id']
+campos_obrigatorios = ['semestre', 'materia_curso_id', 'turno', 'dia_da_semana', 'campus_id']
+tipos_campos = {
+    'semestre': str, 'materia_curso_id': int, 'professor_id': int, 'turno': str,
+    'dia_da_semana': str, 'campus_id': int, 'materia_id': int,
+}
+
+
+def load_materia_curso(cursor):
+    def carregar():
+        cursor.execute("SELECT id, materia_id FROM Materia_Curso")
+        return {mc['id']: mc['materia_id'] for mc in cursor.fetchall()}
+    return cache.obter('Materia_Curso', 'id->materia_id', carregar)
+
+
+def load_campus_id_set(cursor):
+    def carregar():
+        cursor.execute("SELECT id FROM Campus")
+        return frozenset(c['id'] for c in cursor.fetchall())
+    return cache.obter('Campus', 'ids', carregar)
+
+
+def _selecionar_ids(cursor, consulta, ids):
+    rows = []
+    for lote in chunks(sorted(ids), batch_size):
+        placeholders = ', '.join(['%s'] * len(lote))
+        cursor.execute(consulta.format(placeholders=placeholders), lote)
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def _eh_id(valor):
+    # bool é subclasse de int, mas True não é um id
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def _tipo_invalido(turma):
+    """Primeiro campo com tipo errado (antes de qualquer busca em dict/set, .lower() ou consulta)."""
+    for campo, tipo in tipos_campos.items():
+        valor = turma.get(campo)
+        if valor is None:
+            continue
+        if (not _eh_id(valor)) if tipo is int else not isinstance(valor, str):
+            return f"Invalid {campo}: expected {'an integer' if tipo is int else 'a string'}"
+    return None
+
+
+def _professores_existentes(cursor, turmas):
+    ids = {turma.get('professor_id') for turma in turmas
+           if isinstance(turma, dict) and _eh_id(turma.get('professor_id'))}
+    if not ids:
+        return set()
+    rows = _selecionar_ids(cursor, "SELECT id FROM Professores WHERE id IN ({placeholders})", ids)
+    return {row['id'] for row in rows}
+
+
+def _validar(turma, materias_curso, campus_ids, professor_ids):
+    """Devolve a mensagem de erro do item, ou None; completa materia_id a partir de Materia_Curso."""
+    erro = _tipo_invalido(turma)
+    if erro:
+        return erro
+    faltando = [campo for campo in campos_obrigatorios if not turma.get(campo)]
+    if faltando:
+        return f"Missing required fields: {faltando}"
+    if turma['turno'] not in TURNOS:
+        return f"Invalid turno: {turma['turno']}"
+    if coluna_dia_turno(turma['dia_da_semana'], turma['turno']) not in BIT_POR_COLUNA:
+        return f"Invalid dia_da_semana: {turma['dia_da_semana']}"
+    if turma['materia_curso_id'] not in materias_curso:
+        return f"Materia_Curso {turma['materia_curso_id']} not found"
+    if turma['campus_id'] not in campus_ids:
+        return f"Campus {turma['campus_id']} not found"
+    if turma.get('professor_id') and turma['professor_id'] not in professor_ids:
+        return f"Professor {turma['professor_id']} not found"
+    materia_id = materias_curso[turma['materia_curso_id']]
+    if turma.get('materia_id') and turma['materia_id'] != materia_id:
+        return f"materia_id {turma['materia_id']} does not match Materia_Curso {turma['materia_curso_id']}"
+    turma['materia_id'] = materia_id
+    return None
+
+
+def _resolver_conflitos(cursor, candidatos):
+    """
+    Recusa os itens que deixariam um professor com duas turmas no mesmo horário.
+    `candidatos` é uma lista de (indice, turma_id ou None, turma). As turmas do próprio
+    lote liberam o horário antigo, então trocas entre elas são aceitas; se um item for
+    recusado, o horário antigo dele continua ocupado e os demais são verificados de novo.
+    Cada horário ocupado segundo o índice é conferido uma vez no banco (ocupacao.confirmar).
+    """
+    recusados = {}
+    confirmados = set()
+    while True:
+        aceitos = {turma_id for indice, turma_id, _ in candidatos if turma_id and indice not in recusados}
+        reservas = {}
+        novos = {}
+        for indice, turma_id, turma in candidatos:
+            professor_id = turma.get('professor_id')
+            if indice in recusados or not professor_id:
+                continue
+            k = (professor_id, turma['semestre'], coluna_dia_turno(turma['dia_da_semana'], turma['turno']))
+            if k in reservas:
+                novos[indice] = f"Professor {professor_id} is also assigned to item {reservas[k]} on this semester/day/shift"
+                continue
+            outras = ocupacao.ocupantes(professor_id, turma['semestre'], turma['dia_da_semana'], turma['turno']) - aceitos
+            if outras and k not in confirmados:
+                confirmados.add(k)
+                # O índice deste processo pode estar desatualizado: confirmar() o corrige pelo banco
+                ocupacao.confirmar(cursor, professor_id, turma['semestre'], turma['dia_da_semana'], turma['turno'])
+                outras = ocupacao.ocupantes(professor_id, turma['semestre'], turma['dia_da_semana'], turma['turno']) - aceitos
+            if outras:
+                novos[indice] = f"Professor {professor_id} already teaches class {min(outras)} on this semester/day/shift"
+                continue
+            reservas[k] = indice
+        if not novos:
+            return recusados
+        recusados.update(novos)
+
+
+def _erro(indice, mensagem):
+    return {"indice": indice, "status": "erro", "erro": mensagem}
+
+
+def inserir_turmas(connection, itens):
+    """Cria as turmas válidas de `itens` com INSERTs de várias linhas em uma transação."""
+    resultados = [None] * len(itens)
+    with connection.cursor() as cursor:
+        ocupacao.garantir_carregado(cursor)
+        materias_curso = load_materia_curso(cursor)
+        campus_ids = load_campus_id_set(cursor)
+        professor_ids = _professores_existentes(cursor, itens)
+
+        candidatos = []
+        for indice, item in enumerate(itens):
+            if not isinstance(item, dict):
+                resultados[indice] = _erro(indice, "Item must be an object")
+                continue
+            turma = {campo: item.get(campo) for campo in campos_turma}
+            erro = _validar(turma, materias_curso, campus_ids, professor_ids)
+            if erro:
+                resultados[indice] = _erro(indice, erro)
+            else:
+                candidatos.append((indice, None, turma))
+        for indice, erro in _resolver_conflitos(cursor, candidatos).items():
+            resultados[indice] = _erro(indice, erro)
+        validos = [(indice, turma) for indice, _, turma in candidatos if resultados[indice] is None]
+
+        criadas = []
+        try:
+            if validos:
+                # Turmas sem professor não têm chave única para reler os ids: o id de cada
+                # uma é lastrowid + posição, o que exige auto_increment_increment = 1
+                verificar_ids_consecutivos(cursor)
+            for lote in chunks(validos, batch_size):
+                # Ids consecutivos no mesmo INSERT: o id de cada turma é lastrowid + posição
+                valores = []
+                for _, turma in lote:
+                    valores.extend(turma[campo] for campo in campos_turma)
+                placeholders = ', '.join([f"({', '.join(['%s'] * len(campos_turma))})"] * len(lote))
+                cursor.execute(f"INSERT INTO Turma ({', '.join(campos_turma)}) VALUES {placeholders}", valores)
+                primeiro_id = cursor.lastrowid
+                criadas.extend((indice, primeiro_id + posicao, turma) for posicao, (indice, turma) in enumerate(lote))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    for indice, turma_id, turma in criadas:
+        ocupacao.registrar(turma_id, turma['professor_id'], turma['semestre'], turma['dia_da_semana'], turma['turno'])
+        resultados[indice] = {"indice": indice, "status": "criada", "id": turma_id}
+    if criadas:
+        cache.invalidar('Turma')
+    return resultados
+
+
+def atualizar_turmas(connection, itens):
+    """
+    Atualiza as turmas de `itens` (cada item traz `id` e apenas os campos alterados)
+    com executemany em uma transação.
+    """
+    resultados = [None] * len(itens)
+    with connection.cursor() as cursor:
+        ocupacao.garantir_carregado(cursor)
+        materias_curso = load_materia_curso(cursor)
+        campus_ids = load_campus_id_set(cursor)
+        professor_ids = _professores_existentes(cursor, itens)
+
+        ids = {item.get('id') for item in itens if isinstance(item, dict) and _eh_id(item.get('id'))}
+        atuais = {}
+        if ids:
+            rows = _selecionar_ids(
+                cursor, f"SELECT id, {', '.join(campos_turma)} FROM Turma WHERE id IN ({{placeholders}})", ids)
+            atuais = {row['id']: row for row in rows}
+
+        candidatos = []
+        vistos = set()
+        for indice, item in enumerate(itens):
+            if not isinstance(item, dict) or not item.get('id'):
+                resultados[indice] = _erro(indice, "Missing id")
+                continue
+            turma_id = item['id']
+            if not _eh_id(turma_id):
+                resultados[indice] = _erro(indice, "Invalid id: expected an integer")
+                continue
+            if turma_id in vistos:
+                resultados[indice] = _erro(indice, f"Class {turma_id} appears more than once")
+                continue
+            vistos.add(turma_id)
+            if turma_id not in atuais:
+                resultados[indice] = _erro(indice, f"Class {turma_id} not found")
+                continue
+            turma = {campo: item[campo] if campo in item else atuais[turma_id][campo] for campo in campos_turma}
+            if 'materia_curso_id' in item and 'materia_id' not in item:
+                turma['materia_id'] = None
+            erro = _validar(turma, materias_curso, campus_ids, professor_ids)
+            if erro:
+                resultados[indice] = _erro(indice, erro)
+            else:
+                candidatos.append((indice, turma_id, turma))
+        for indice, erro in _resolver_conflitos(cursor, candidatos).items():
+            resultados[indice] = _erro(indice, erro)
+        validos = [(indice, turma_id, turma) for indice, turma_id, turma in candidatos if resultados[indice] is None]
+
+        try:
+            # Libera os professores antes: trocas de horário entre turmas do lote violariam
+            # a restrição UNIQUE de Turma no meio do executemany
+            cursor.executemany(
+                "UPDATE Turma SET professor_id = NULL WHERE id = %s",
+                [turma_id for _, turma_id, _ in validos if atuais[turma_id]['professor_id']],
+            )
+            atribuicoes = ', '.join(f"{campo} = %s" for campo in campos_turma)
+            cursor.executemany(
+                f"UPDATE Turma SET {atribuicoes} WHERE id = %s",
+                [[turma[campo] for campo in campos_turma] + [turma_id] for _, turma_id, turma in validos],
+            )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    for indice, turma_id, turma in validos:
+        ocupacao.registrar(turma_id, turma['professor_id'], turma['semestre'], turma['dia_da_semana'], turma['turno'])
+        resultados[indice] = {"indice": indice, "status": "atualizada", "id": turma_id}
+    if validos:
+        cache.invalidar('Turma')
+    return resultados